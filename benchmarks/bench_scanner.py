@@ -0,0 +1,66 @@
+"""Benchmark da leitura do CSV: leitor por mmap x módulo csv.
+
+Gera um CSV sintético com N linhas (uma fração com produto entre aspas, que
+força o fallback para o módulo csv), lê o arquivo com os dois leitores,
+confere que as vendas são idênticas e mostra os tempos.
+
+Uso:
+    python benchmarks/bench_scanner.py [--rows 1000000] [--quoted 0.01] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List, Sequence, Tuple
+
+from vendas_cli.parser import Sale, read_sales_csv
+
+
+def write_csv(path: str, rows: int, quoted: float) -> None:
+    rng = random.Random(42)
+    with open(path, mode="w", encoding="utf-8", newline="") as file:
+        file.write("produto,valor,data\n")
+        for i in range(rows):
+            product = f"Produto {rng.randint(0, 9999):04d}"
+            if rng.random() < quoted:
+                product = f'"{product}, edição ""especial"""'
+            file.write(f"{product},{rng.uniform(0, 1000):.2f},2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}\n")
+
+
+def best_of(repeat: int, path: str, use_mmap: bool) -> Tuple[float, List[Sale]]:
+    best = float("inf")
+    sales: List[Sale] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sales = read_sales_csv(path, use_mmap=use_mmap)
+        best = min(best, time.perf_counter() - start)
+    return best, sales
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Quantidade de linhas (padrão: 1000000).")
+    parser.add_argument("--quoted", type=float, default=0.01, help="Fração de linhas com aspas (padrão: 0.01).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições; vale o melhor tempo (padrão: 3).")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vendas.csv")
+        write_csv(path, args.rows, args.quoted)
+        csv_time, csv_sales = best_of(args.repeat, path, use_mmap=False)
+        mmap_time, mmap_sales = best_of(args.repeat, path, use_mmap=True)
+
+    print(f"linhas:  {args.rows}")
+    print(f"csv:     {csv_time:8.3f} s")
+    print(f"mmap:    {mmap_time:8.3f} s  ({csv_time / mmap_time:.1f}x)")
+    if mmap_sales != csv_sales:
+        print("ERRO: vendas diferentes", file=sys.stderr)
+        return 1
+    print("vendas idênticas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
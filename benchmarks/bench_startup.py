@@ -0,0 +1,83 @@
+"""Benchmark de inicialização do `vendas-cli` baseado em `python -X importtime`.
+
+Executa cada cenário em um interpretador novo, soma o tempo cumulativo dos
+módulos do pacote importados no nível superior e compara a mediana com o
+orçamento.
+
+Uso:
+    python benchmarks/bench_startup.py [--runs 7] [--budget-ms 50]
+
+Retorna código 1 se algum cenário estourar o orçamento ou carregar um módulo
+proibido (ex.: `tabulate` em um relatório JSON).
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import List, Sequence, Tuple
+
+# (nome, código executado, módulos que não podem ser carregados)
+SCENARIOS: List[Tuple[str, str, Sequence[str]]] = [
+    ("import cli", "import vendas_cli.cli", ("tabulate", "json", "csv")),
+    (
+        "modo json",
+        "import vendas_cli.cli, vendas_cli.parser, vendas_cli.core, vendas_cli.output",
+        ("tabulate",),
+    ),
+]
+
+
+def measure(code: str) -> Tuple[float, List[str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = 0
+    modules: List[str] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabeçalho
+        modules.append(name.strip())
+        # Apenas imports de nível superior (sem indentação) do pacote entram na
+        # soma: o tempo cumulativo deles já inclui as dependências, e a
+        # inicialização do interpretador (site, encodings) fica de fora.
+        if name.startswith(" vendas_cli"):
+            total_us += int(cumulative)
+    return total_us / 1000.0, modules
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="Execuções por cenário (padrão: 7).")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Orçamento por cenário em ms (padrão: 50).")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name, code, forbidden in SCENARIOS:
+        samples = []
+        loaded: List[str] = []
+        for _ in range(args.runs):
+            elapsed_ms, loaded = measure(code)
+            samples.append(elapsed_ms)
+        median = statistics.median(samples)
+        leaked = sorted(set(forbidden) & set(loaded))
+
+        status = "OK"
+        if median > args.budget_ms:
+            status = "ACIMA DO ORÇAMENTO"
+            failed = True
+        if leaked:
+            status = f"CARREGOU {', '.join(leaked)}"
+            failed = True
+        print(f"{name:<12} mediana={median:7.2f} ms  min={min(samples):7.2f} ms  orçamento={args.budget_ms:.0f} ms  {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Benchmark da tabela do relatório texto: renderizador próprio x tabulate.
+
+Gera N produtos sintéticos, renderiza a tabela "grid" com os dois
+renderizadores, confere que a saída é idêntica byte a byte e mostra os tempos.
+
+Uso:
+    python benchmarks/bench_text_table.py [--products 100000] [--repeat 3]
+"""
+import argparse
+import io
+import random
+import sys
+import time
+from typing import List, Sequence, Tuple
+
+from vendas_cli.output import _write_tabulate_table, write_product_table
+
+
+def make_items(count: int) -> List[Tuple[str, float]]:
+    rng = random.Random(42)
+    return sorted(
+        (f"Produto {i:07d}{'x' * rng.randint(0, 20)}", rng.uniform(0, 100000))
+        for i in range(count)
+    )
+
+
+def best_of(repeat: int, render, items) -> Tuple[float, str]:
+    best = float("inf")
+    output = ""
+    for _ in range(repeat):
+        stream = io.StringIO()
+        start = time.perf_counter()
+        render(items, stream)
+        best = min(best, time.perf_counter() - start)
+        output = stream.getvalue()
+    return best, output
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000, help="Quantidade de produtos (padrão: 100000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições; vale o melhor tempo (padrão: 3).")
+    args = parser.parse_args(argv)
+
+    items = make_items(args.products)
+    builtin_time, builtin_output = best_of(args.repeat, write_product_table, items)
+    tabulate_time, tabulate_output = best_of(args.repeat, _write_tabulate_table, items)
+
+    print(f"produtos:  {args.products}")
+    print(f"tabulate:  {tabulate_time:8.3f} s")
+    print(f"embutido:  {builtin_time:8.3f} s  ({tabulate_time / builtin_time:.1f}x)")
+    if builtin_output != tabulate_output:
+        print("ERRO: saídas diferentes", file=sys.stderr)
+        return 1
+    print("saídas idênticas")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
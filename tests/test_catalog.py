@@ -0,0 +1,167 @@
+import pytest
+import random
+from datetime import date
+from typing import List
+from vendas_cli.parser import EncodedSale, Sale, iter_encoded_sales_csv
+from vendas_cli.core import calculate_sales_metrics
+from vendas_cli.errors import ErrorReport
+from vendas_cli.output import format_json, format_text
+from vendas_cli.catalog import CatalogTotals, ProductCatalog, calculate_encoded_sales_metrics
+
+def make_sales(products: int, sales: int) -> List[Sale]:
+    rng = random.Random(7)
+    return [
+        Sale(produto=f"Produto {rng.randrange(products):05d}", valor=float(rng.randint(1, 500)), data=date(2025, 1, 1))
+        for _ in range(sales)
+    ]
+
+def encode(sales: List[Sale], catalog: ProductCatalog) -> List[EncodedSale]:
+    return [EncodedSale(produto_id=catalog.encode(s["produto"]), valor=s["valor"], data=s["data"]) for s in sales]
+
+def test_catalog_ids_are_stable_across_runs(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "produtos.jsonl")
+    first = ProductCatalog(path)
+    first.encode("Produto B")
+    first.encode("Café \"especial\"\nlinha 2")
+    first.save()
+
+    # WHEN
+    second = ProductCatalog(path)
+    new_id = second.encode("Produto A")
+    saved = second.save()
+    third = ProductCatalog(path)
+
+    # THEN
+    assert second.encode("Produto B") == 0
+    assert second.encode("Café \"especial\"\nlinha 2") == 1
+    assert new_id == 2
+    assert saved == 1
+    assert third.names == ["Produto B", "Café \"especial\"\nlinha 2", "Produto A"]
+    assert len((tmp_path / "produtos.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+
+def test_catalog_rejects_invalid_file(tmp_path):
+    # GIVEN
+    path = tmp_path / "produtos.jsonl"
+    path.write_text('"Produto A"\n{"nome": 1\n', encoding="utf-8")
+
+    # WHEN/THEN
+    with pytest.raises(ValueError, match="linha 2"):
+        ProductCatalog(str(path))
+
+def test_catalog_tolerates_repeated_name(tmp_path):
+    # GIVEN
+    path = tmp_path / "produtos.jsonl"
+    path.write_text('"Produto A"\n"Produto A"\n"Produto B"\n', encoding="utf-8")
+
+    # WHEN
+    catalog = ProductCatalog(str(path))
+
+    # THEN
+    assert catalog.names == ["Produto A", "Produto B"]
+    assert catalog.encode("Produto B") == 1
+
+def test_overlapping_runs_merge_new_names(tmp_path):
+    # GIVEN
+    path = str(tmp_path / "produtos.jsonl")
+    base = ProductCatalog(path)
+    base.encode("Antigo")
+    base.save()
+    first = ProductCatalog(path)
+    second = ProductCatalog(path)
+    first.encode("Novo")
+    first.encode("So no primeiro")
+    second.encode("So no segundo")
+    second.encode("Novo")
+    sales = [EncodedSale(produto_id=second.encode("So no segundo"), valor=2.0, data=date(2025, 1, 1)),
+             EncodedSale(produto_id=second.encode("Novo"), valor=3.0, data=date(2025, 1, 1))]
+    metrics = calculate_encoded_sales_metrics(sales, second)
+
+    # WHEN
+    first.save()
+    added = second.save()
+    reloaded = ProductCatalog(path)
+
+    # THEN
+    assert added == 1
+    assert reloaded.names == ["Antigo", "Novo", "So no primeiro", "So no segundo"]
+    assert second.ids == reloaded.ids
+    assert dict(metrics["total_por_produto"].items()) == {"So no segundo": 2.0, "Novo": 3.0}
+    assert metrics["total_por_produto"]["Novo"] == 3.0
+    assert (tmp_path / "produtos.jsonl").read_text(encoding="utf-8").count('"Novo"') == 1
+
+def test_encoded_metrics_match_string_metrics():
+    # GIVEN
+    catalog = ProductCatalog()
+    catalog.encode("Produto fora do arquivo")
+    sales = make_sales(300, 5000)
+
+    # WHEN
+    metrics = calculate_encoded_sales_metrics(iter(encode(sales, catalog)), catalog)
+    expected = calculate_sales_metrics(sales)
+
+    # THEN
+    totals = metrics["total_por_produto"]
+    assert isinstance(totals, CatalogTotals)
+    assert list(totals) == list(expected["total_por_produto"])
+    assert dict(totals.items()) == expected["total_por_produto"]
+    assert totals["Produto 00042"] == expected["total_por_produto"]["Produto 00042"]
+    assert "Produto fora do arquivo" not in totals
+    assert metrics["valor_total_vendas"] == expected["valor_total_vendas"]
+    assert metrics["produto_mais_vendido"] == expected["produto_mais_vendido"]
+    assert format_text(metrics) == format_text(expected)
+    assert format_json(metrics) == format_json(expected)
+
+def test_encoded_metrics_reports_invalid_records():
+    # GIVEN
+    catalog = ProductCatalog()
+    report = ErrorReport()
+    sales = [
+        {"produto_id": catalog.encode("Produto A"), "valor": 10.0, "data": date(2025, 1, 1)},
+        {"valor": 5.0, "data": date(2025, 1, 1)},
+        {"produto_id": catalog.encode("Produto B"), "valor": "abc", "data": date(2025, 1, 1)},
+    ]
+
+    # WHEN
+    metrics = calculate_encoded_sales_metrics(sales, catalog, report)
+
+    # THEN
+    assert dict(metrics["total_por_produto"]) == {"Produto A": 10.0}
+    assert report.counts == {"registro_invalido": 1, "tipo_invalido": 1}
+
+def test_iter_encoded_sales_csv(tmp_path):
+    # GIVEN
+    file_path = tmp_path / "vendas.csv"
+    file_path.write_text("produto,valor,data\nProduto A,10,2025-01-15\nProduto B,5,2025-01-16\nProduto A,1,2025-01-17\n", encoding="utf-8")
+    catalog = ProductCatalog()
+    catalog.encode("Produto B")
+
+    # WHEN
+    sales = list(iter_encoded_sales_csv(str(file_path), catalog))
+
+    # THEN
+    assert [s["produto_id"] for s in sales] == [1, 0, 1]
+    assert sales[0] == EncodedSale(produto_id=1, valor=10.0, data=date(2025, 1, 15))
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_iter_encoded_sales_csv_skips_rejected_names(tmp_path, use_mmap):
+    # GIVEN
+    file_path = tmp_path / "vendas.csv"
+    file_path.write_text(
+        'produto,valor,data\nProduto A,10,2025-01-15\nRejeitado,abc,2025-01-16\n"Produto, B",2,2025-01-16\nProduto A,1,2025-01-17\n',
+        encoding="utf-8"
+    )
+    catalog = ProductCatalog()
+    report = ErrorReport()
+
+    # WHEN
+    sales = list(iter_encoded_sales_csv(str(file_path), catalog, report, use_mmap=use_mmap))
+
+    # THEN
+    assert catalog.names == ["Produto A", "Produto, B"]
+    assert sales == [
+        EncodedSale(produto_id=0, valor=10.0, data=date(2025, 1, 15)),
+        EncodedSale(produto_id=1, valor=2.0, data=date(2025, 1, 16)),
+        EncodedSale(produto_id=0, valor=1.0, data=date(2025, 1, 17)),
+    ]
+    assert report.counts == {"valor_invalido": 1}
@@ -181,3 +181,253 @@ def test_cli_verbose_mode(valid_csv_cli, caplog):
     assert "Logging configurado para DEBUG." in caplog.text
     assert "Argumentos recebidos:" in caplog.text
 
+
+def test_cli_import_has_no_side_effects():
+    # GIVEN
+    import subprocess
+    code = (
+        "import sys, logging, vendas_cli.cli, vendas_cli.output;"
+        "print('tabulate' in sys.modules, bool(logging.getLogger().handlers))"
+    )
+
+    # WHEN
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    # THEN
+    assert result.stdout.split() == ["False", "False"]
+
+def test_cli_bounded_error_summary(tmp_path, capsys, caplog):
+    # GIVEN
+    import logging
+    lines = ["produto,valor,data", "ProdA,10.0,2025-01-15"] + [f"ProdX,abc{i},2025-01-20" for i in range(10)]
+    file_path = tmp_path / "sujo.csv"
+    file_path.write_text("\n".join(lines), encoding="utf-8")
+    quarantine = tmp_path / "quarentena.csv"
+    argv = [str(file_path), "--max-error-examples", "2", "--quarantine", str(quarantine)]
+
+    # WHEN
+    with caplog.at_level(logging.WARNING):
+        exit_code = main(argv)
+
+    # THEN
+    assert exit_code == 0
+    assert caplog.text.count("Erro de valor ou formato") == 2
+    assert "Resumo de erros: 10 registro(s) ignorado(s) (valor_invalido: 10)" in caplog.text
+    assert len(quarantine.read_text(encoding="utf-8").splitlines()) == 11
+
+def test_cli_rejects_file(csv_with_error_cli, tmp_path, capsys):
+    # GIVEN
+    rejects = tmp_path / "rejeitos.ndjson"
+    argv = [csv_with_error_cli, "--rejects", str(rejects)]
+
+    # WHEN
+    exit_code = main(argv)
+
+    # THEN
+    assert exit_code == 0
+    assert json.loads(rejects.read_text(encoding="utf-8")) == {
+        "linha": 3, "motivo": "valor_invalido", "conteudo": "ProdB,abc,2025-01-20"
+    }
+
+@pytest.mark.parametrize("option", ["--output", "--quarantine", "--rejects"])
+def test_cli_missing_output_directory_names_output_path(valid_csv_cli, tmp_path, option, capsys):
+    # GIVEN
+    target = str(tmp_path / "inexistente" / "saida.txt")
+
+    # WHEN
+    exit_code = main([valid_csv_cli, option, target])
+
+    # THEN
+    assert exit_code == 1
+    assert f"Erro: Arquivo não encontrado: {target}" in capsys.readouterr().err
+
+def test_cli_no_mmap_produces_same_report(valid_csv_cli, capsys):
+    # GIVEN
+    main([valid_csv_cli, "--format", "json"])
+    expected = capsys.readouterr().out
+
+    # WHEN
+    exit_code = main([valid_csv_cli, "--format", "json", "--no-mmap"])
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 0
+    assert captured.out == expected
+
+def test_cli_ndjson_to_output_file(valid_csv_cli, tmp_path, capsys):
+    # GIVEN
+    output = tmp_path / "relatorio.ndjson"
+    argv = [valid_csv_cli, "--format", "ndjson", "--output", str(output)]
+
+    # WHEN
+    exit_code = main(argv)
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 0
+    assert captured.out == ""
+    entries = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert entries[0] == {"tipo": "produto", "produto": "ProdA", "valor_total": 15.0}
+    assert entries[-1]["valor_total_vendas"] == 35.0
+
+def test_cli_compact_json(valid_csv_cli, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--format", "json", "--compact"]
+
+    # WHEN
+    exit_code = main(argv)
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 0
+    assert captured.out.count("\n") == 1
+    assert json.loads(captured.out)["valor_total_vendas"] == 35.0
+
+def test_cli_text_pagination(valid_csv_cli, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--max-rows", "1", "--page", "2"]
+
+    # WHEN
+    exit_code = main(argv)
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 0
+    assert "| ProdB" in captured.out
+    assert "| ProdA" not in captured.out
+    assert "Exibindo produtos 2 a 2 de 2." in captured.out
+
+def test_cli_page_without_max_rows(valid_csv_cli, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--page", "2"]
+
+    # WHEN/THEN
+    with pytest.raises(SystemExit) as e:
+        main(argv)
+    assert e.value.code == 2
+    assert "--page exige --max-rows." in capsys.readouterr().err
+
+def test_cli_ingest_and_query(valid_csv_cli, tmp_path, capsys):
+    # GIVEN
+    db = str(tmp_path / "vendas.db")
+
+    # WHEN
+    ingest_code = main(["ingest", valid_csv_cli, "--db", db])
+    ingest_out = capsys.readouterr().out
+    query_code = main(["query", "--db", db, "--format", "json", "--start", "2025-01-16"])
+    captured = capsys.readouterr()
+
+    # THEN
+    assert ingest_code == 0
+    assert "3 vendas" in ingest_out
+    assert query_code == 0
+    data = json.loads(captured.out)
+    assert data["total_por_produto"] == {"ProdA": 5.0, "ProdB": 20.0}
+    assert data["produto_mais_vendido"] == {"produto": "ProdB", "valor_total": 20.0}
+
+def test_cli_ingest_twice_does_not_duplicate(valid_csv_cli, tmp_path, capsys):
+    # GIVEN
+    db = str(tmp_path / "vendas.db")
+    main(["ingest", valid_csv_cli, "--db", db])
+    capsys.readouterr()
+
+    # WHEN
+    again_code = main(["ingest", valid_csv_cli, "--db", db])
+    again_out = capsys.readouterr().out
+    replace_code = main(["ingest", valid_csv_cli, "--db", db, "--replace"])
+    capsys.readouterr()
+    main(["query", "--db", db, "--format", "json", "--start", "2025-01-16"])
+    data = json.loads(capsys.readouterr().out)
+
+    # THEN
+    assert again_code == replace_code == 0
+    assert "ignorado" in again_out
+    assert data["total_por_produto"] == {"ProdA": 5.0, "ProdB": 20.0}
+
+def test_cli_query_missing_db(tmp_path, capsys):
+    # GIVEN
+    argv = ["query", "--db", str(tmp_path / "inexistente.db")]
+
+    # WHEN
+    exit_code = main(argv)
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 1
+    assert "Banco não encontrado" in captured.err
+    assert not (tmp_path / "inexistente.db").exists()
+
+def test_cli_ingest_file_not_found(tmp_path, capsys):
+    # GIVEN
+    argv = ["ingest", "inexistente.csv", "--db", str(tmp_path / "vendas.db")]
+
+    # WHEN
+    exit_code = main(argv)
+
+    # THEN
+    assert exit_code == 1
+    assert "Erro: Arquivo não encontrado: inexistente.csv" in capsys.readouterr().err
+
+def test_cli_max_memory(valid_csv_cli, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--max-memory", "1K", "--format", "json", "--start", "2025-01-16"]
+
+    # WHEN
+    exit_code = main(argv)
+    captured = capsys.readouterr()
+
+    # THEN
+    assert exit_code == 0
+    data = json.loads(captured.out)
+    assert data["total_por_produto"] == {"ProdA": 5.0, "ProdB": 20.0}
+    assert data["produto_mais_vendido"] == {"produto": "ProdB", "valor_total": 20.0}
+
+def test_cli_max_memory_empty_csv(empty_csv_cli, capsys):
+    # GIVEN
+    argv = [empty_csv_cli, "--max-memory", "64M"]
+
+    # WHEN
+    exit_code = main(argv)
+
+    # THEN
+    assert exit_code == 1
+    assert "Nenhuma venda encontrada para processar" in capsys.readouterr().err
+
+def test_cli_invalid_max_memory(valid_csv_cli, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--max-memory", "muito"]
+
+    # WHEN/THEN
+    with pytest.raises(SystemExit) as e:
+        main(argv)
+    assert e.value.code == 2
+    assert "Tamanho de memória inválido: muito" in capsys.readouterr().err
+
+def test_cli_catalog_matches_default_report(valid_csv_cli, tmp_path, capsys):
+    # GIVEN
+    catalog = tmp_path / "produtos.jsonl"
+    main([valid_csv_cli, "--format", "json"])
+    expected = capsys.readouterr().out
+
+    # WHEN
+    first_exit = main([valid_csv_cli, "--format", "json", "--catalog", str(catalog)])
+    first = capsys.readouterr().out
+    saved = catalog.read_text(encoding="utf-8")
+    second_exit = main([valid_csv_cli, "--format", "json", "--catalog", str(catalog)])
+    second = capsys.readouterr().out
+
+    # THEN
+    assert first_exit == second_exit == 0
+    assert first == second == expected
+    assert saved.splitlines() == ['"ProdA"', '"ProdB"']
+    assert catalog.read_text(encoding="utf-8") == saved
+
+def test_cli_catalog_and_max_memory_are_exclusive(valid_csv_cli, tmp_path, capsys):
+    # GIVEN
+    argv = [valid_csv_cli, "--catalog", str(tmp_path / "produtos.jsonl"), "--max-memory", "64M"]
+
+    # WHEN/THEN
+    with pytest.raises(SystemExit) as e:
+        main(argv)
+    assert e.value.code == 2
+    assert "--max-memory" in capsys.readouterr().err
@@ -78,3 +78,38 @@ def test_calculate_sales_metrics_with_invalid_data(caplog):
     assert "Chave ausente: 'produto'" in caplog.text
     assert "Registro de venda com tipo inválido" in caplog.text
 
+
+def test_sales_accumulator_matches_calculate_sales_metrics():
+    # GIVEN
+    from vendas_cli.core import SalesAccumulator
+    accumulator = SalesAccumulator()
+
+    # WHEN
+    for sale in EXAMPLE_SALES:
+        accumulator.add(sale)
+    metrics = accumulator.metrics()
+    expected = calculate_sales_metrics(EXAMPLE_SALES)
+
+    # THEN
+    assert accumulator.count == 5
+    assert metrics["total_por_produto"] == pytest.approx(expected["total_por_produto"])
+    assert metrics["valor_total_vendas"] == pytest.approx(expected["valor_total_vendas"])
+    assert metrics["produto_mais_vendido"] == expected["produto_mais_vendido"]
+
+def test_sales_accumulator_breaks_ties_by_insertion_order():
+    # GIVEN
+    from vendas_cli.core import SalesAccumulator
+    sales = [
+        {'produto': 'A', 'valor': 5.0, 'data': date(2025, 1, 1)},
+        {'produto': 'B', 'valor': 10.0, 'data': date(2025, 1, 2)},
+        {'produto': 'A', 'valor': 5.0, 'data': date(2025, 1, 3)},
+    ]
+    accumulator = SalesAccumulator()
+
+    # WHEN
+    for sale in sales:
+        accumulator.add(sale)
+
+    # THEN
+    assert accumulator.metrics()["produto_mais_vendido"] == ('A', 10.0)
+    assert calculate_sales_metrics(sales)["produto_mais_vendido"] == ('A', 10.0)
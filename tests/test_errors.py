@@ -0,0 +1,55 @@
+import logging
+import pytest
+from vendas_cli.errors import ErrorReport, RejectsWriter
+
+logger = logging.getLogger("vendas_cli.tests")
+
+def test_error_report_logs_only_first_examples(caplog):
+    # GIVEN
+    report = ErrorReport(max_examples=2)
+
+    # WHEN
+    with caplog.at_level(logging.WARNING):
+        for i in range(5):
+            report.record("valor_invalido", logger, "Linha %d: erro", i)
+        report.record("data_invalida", logger, "Linha %d: data", 10)
+
+    # THEN
+    assert report.counts == {"valor_invalido": 5, "data_invalida": 1}
+    assert report.total == 6
+    assert report.examples["valor_invalido"] == ["Linha 0: erro", "Linha 1: erro"]
+    assert "Linha 1: erro" in caplog.text
+    assert "Linha 2: erro" not in caplog.text
+
+def test_error_report_summary(caplog):
+    # GIVEN
+    report = ErrorReport(max_examples=0)
+    report.record("valor_negativo", logger, "exemplo")
+    report.record("valor_negativo", logger, "exemplo")
+
+    # WHEN
+    with caplog.at_level(logging.WARNING):
+        report.log_summary(logger)
+
+    # THEN
+    assert "exemplo" not in caplog.text
+    assert "Resumo de erros: 2 registro(s) ignorado(s) (valor_negativo: 2)" in caplog.text
+    assert "2 ocorrência(s) não exibida(s) individualmente" in caplog.text
+
+def test_error_report_unbounded_and_empty_summary(caplog):
+    # GIVEN
+    report = ErrorReport(max_examples=None)
+
+    # WHEN
+    with caplog.at_level(logging.WARNING):
+        report.log_summary(logger)
+        for i in range(20):
+            report.record("x", logger, "erro %d", i)
+
+    # THEN
+    assert "Resumo de erros" not in caplog.text
+    assert len(report.examples["x"]) == 20
+
+def test_rejects_writer_invalid_format(tmp_path):
+    with pytest.raises(ValueError, match="Formato de arquivo de rejeitos inválido"):
+        RejectsWriter(str(tmp_path / "rejeitos.txt"), "xml")
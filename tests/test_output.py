@@ -6,8 +6,12 @@ from vendas_cli.core import SaleMetrics
 from vendas_cli.output import (
     filter_sales_by_date,
     format_text,
+    write_product_table,
     format_json,
-    generate_report
+    format_ndjson,
+    generate_report,
+    write_json,
+    write_report
 )
 from typing import List, Optional
 
@@ -136,6 +140,107 @@ def test_gerar_relatorio_json():
 
 def test_gerar_relatorio_formato_invalido():
     # GIVEN/WHEN/THEN
-    with pytest.raises(ValueError, match=r"Formato de saída inválido:\s*invalido\s*. Use 'text' ou 'json'."):
+    with pytest.raises(ValueError, match=r"Formato de saída inválido:\s*invalido\s*. Use 'text', 'json' ou 'ndjson'."):
         generate_report(EXAMPLE_METRICS, "invalido")
 
+
+def test_write_json_matches_json_dumps():
+    # GIVEN
+    import io
+    metrics: SaleMetrics = {
+        "total_por_produto": {"Açaí \"grande\"": 10.25, "Produto B": 3},
+        "valor_total_vendas": 13.25,
+        "produto_mais_vendido": ("Açaí \"grande\"", 10.25)
+    }
+    expected = {
+        "total_por_produto": metrics["total_por_produto"],
+        "valor_total_vendas": 13.25,
+        "produto_mais_vendido": {"produto": "Açaí \"grande\"", "valor_total": 10.25}
+    }
+
+    # WHEN
+    pretty, compact = io.StringIO(), io.StringIO()
+    write_json(metrics, pretty)
+    write_json(metrics, compact, pretty=False)
+
+    # THEN
+    assert pretty.getvalue() == json.dumps(expected, indent=4, ensure_ascii=False)
+    assert compact.getvalue() == json.dumps(expected, ensure_ascii=False, separators=(",", ":"))
+    assert format_json(EMPTY_METRICS) == json.dumps(
+        {"total_por_produto": {}, "valor_total_vendas": 0.0, "produto_mais_vendido": None}, indent=4
+    )
+
+def test_formatar_ndjson():
+    # GIVEN
+    lines = format_ndjson(EXAMPLE_METRICS).splitlines()
+
+    # WHEN
+    entries = [json.loads(line) for line in lines]
+
+    # THEN
+    assert entries[:3] == [
+        {"tipo": "produto", "produto": "Produto A", "valor_total": 150.5},
+        {"tipo": "produto", "produto": "Produto B", "valor_total": 101.0},
+        {"tipo": "produto", "produto": "Produto C", "valor_total": 200.0},
+    ]
+    assert entries[3] == {
+        "tipo": "resumo",
+        "valor_total_vendas": 451.5,
+        "produto_mais_vendido": {"produto": "Produto C", "valor_total": 200.0}
+    }
+    assert json.loads(format_ndjson(EMPTY_METRICS))["produto_mais_vendido"] is None
+
+def test_write_report_matches_generate_report():
+    # GIVEN
+    import io
+
+    for format in ("text", "json", "ndjson"):
+        # WHEN
+        stream = io.StringIO()
+        write_report(EXAMPLE_METRICS, format, stream)
+
+        # THEN
+        assert stream.getvalue() == generate_report(EXAMPLE_METRICS, format) + "\n"
+
+@pytest.mark.parametrize(
+    "items",
+    [
+        [("Produto A", 150.5), ("Produto B", 101.0), ("Produto C", 200.0)],
+        [("Açaí", 1.0), ("Café 中文", 1234567.891), ("Zé", 0.0)],
+        [("1", 10.0), ("22", 5.0)],
+        [("Linha\nDupla", 10.0), ("X", 5.0)],
+        [("\x1b[31mVermelho\x1b[0m", 10.0)],
+    ]
+)
+def test_write_product_table_matches_tabulate(items):
+    # GIVEN
+    import io
+    from tabulate import tabulate
+    expected = tabulate(
+        [[produto, f"R$ {valor:.2f}"] for produto, valor in items],
+        headers=["Produto", "Valor Total"],
+        tablefmt="grid"
+    )
+
+    # WHEN
+    stream = io.StringIO()
+    write_product_table(items, stream)
+
+    # THEN
+    assert stream.getvalue() == expected
+
+def test_formatar_texto_com_paginacao():
+    # GIVEN
+    text = format_text(EXAMPLE_METRICS, max_rows=2)
+    second_page = format_text(EXAMPLE_METRICS, max_rows=2, offset=2)
+    empty_page = format_text(EXAMPLE_METRICS, max_rows=2, offset=10)
+
+    # WHEN/THEN
+    assert "Produto A" in text and "Produto B" in text
+    assert "| Produto C" not in text
+    assert "Exibindo produtos 1 a 2 de 3." in text
+    assert "| Produto C" in second_page and "| Produto A" not in second_page
+    assert "Exibindo produtos 3 a 3 de 3." in second_page
+    assert "Nenhum produto nesta página (3 produtos no total)." in empty_page
+    assert "Produto Mais Vendido: Produto C (R$ 200.00)" in text
+    assert "Exibindo" not in format_text(EXAMPLE_METRICS, max_rows=3)
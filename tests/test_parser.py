@@ -1,7 +1,8 @@
 import pytest
 import os
 from datetime import date
-from vendas_cli.parser import read_sales_csv, Sale
+from vendas_cli.parser import read_sales_csv, iter_sales_csv, Sale
+from vendas_cli.errors import ErrorReport
 
 @pytest.fixture
 def csv_valid(tmp_path):
@@ -127,3 +128,127 @@ def test_read_sales_csv_with_comma_decimal(csv_with_comma_decimal):
     assert sales[0]["valor"] == 100.50
     assert sales[1]["valor"] == 75.20
 
+
+def test_read_sales_csv_reports_error_categories(csv_with_errors):
+    # GIVEN
+    report = ErrorReport(max_examples=1)
+
+    # WHEN
+    sales = read_sales_csv(csv_with_errors, report)
+
+    # THEN
+    assert len(sales) == 2
+    assert report.counts == {
+        "valor_invalido": 1,
+        "data_invalida": 1,
+        "valor_negativo": 1,
+        "produto_vazio": 1,
+        "data_vazia": 1,
+    }
+
+def test_read_sales_csv_short_line(tmp_path):
+    # GIVEN
+    file_path = tmp_path / "curta.csv"
+    file_path.write_text("produto,valor,data\nProduto A,10\nProduto B,5,2025-01-01\n", encoding="utf-8")
+    report = ErrorReport()
+
+    # WHEN
+    sales = read_sales_csv(str(file_path), report)
+
+    # THEN
+    assert [s["produto"] for s in sales] == ["Produto B"]
+    assert report.counts == {"coluna_ausente": 1}
+
+def test_read_sales_csv_writes_quarantine(csv_with_errors, tmp_path):
+    # GIVEN
+    quarantine = tmp_path / "quarentena.csv"
+
+    # WHEN
+    read_sales_csv(csv_with_errors, quarantine_path=str(quarantine))
+
+    # THEN
+    assert quarantine.read_text(encoding="utf-8").splitlines() == [
+        "produto,valor,data",
+        "Produto B,invalido,2025-01-16",
+        "Produto C,50,2025/01/17",
+        "Produto D,-10,2025-01-18",
+        ",20,2025-01-19",
+        "Produto F,30,",
+    ]
+
+def test_read_sales_csv_writes_rejects_csv(tmp_path):
+    # GIVEN
+    rejects = tmp_path / "rejeitos.csv"
+
+    # WHEN
+    sales = read_sales_csv(os.path.join(os.path.dirname(__file__), "vendas_test.csv"), rejects_path=str(rejects))
+
+    # THEN
+    assert len(sales) == 6
+    assert rejects.read_text(encoding="utf-8").splitlines() == [
+        "linha,motivo,conteudo",
+        '5,data_invalida,"Produto C,200,00,2025-02-10"',
+        '7,valor_invalido,"Produto D,,2025-03-01"',
+        '9,valor_negativo,"Produto F,-10,2025-03-10"',
+        '10,data_invalida,"Produto G,300,invalida"',
+    ]
+
+def test_read_sales_csv_writes_rejects_jsonl(tmp_path):
+    # GIVEN
+    import json
+    content = 'produto,valor,data\r\nProduto A,"1,5",2025-01-15\r\n"Produto\nB",abc,2025-01-16\r\nProduto C,2,2025-01-17\r\n'
+    file_path = tmp_path / "multilinha.csv"
+    file_path.write_bytes(content.encode("utf-8"))
+    rejects = tmp_path / "rejeitos.jsonl"
+
+    # WHEN
+    sales = list(iter_sales_csv(str(file_path), rejects_path=str(rejects)))
+
+    # THEN
+    assert [s["produto"] for s in sales] == ["Produto A", "Produto C"]
+    entries = [json.loads(line) for line in rejects.read_text(encoding="utf-8").splitlines()]
+    assert entries == [{"linha": 4, "motivo": "valor_invalido", "conteudo": '"Produto\nB",abc,2025-01-16'}]
+
+def test_mmap_scanner_matches_csv_module(tmp_path):
+    # GIVEN
+    import json
+    content = (
+        'produto,valor,data\r\n'
+        'Produto A,10,2025-01-15\r\n'
+        '\r\n'
+        'TV 5" polegadas,20,2025-01-16\n'
+        '"Produto, B",1_0,2025-01-17,extra\n'
+        '"Produto\nC",abc,2025-01-18\n'
+        'Produto D, 5,2025-1-9\rProduto E,-1,2025-01-19\n'
+        'Café ,nan,2025-02-30\n'
+        'Produto F,3\n'
+        ' Produto G ,1e2,2025-01-20'
+    )
+    file_path = tmp_path / "misto.csv"
+    file_path.write_bytes(content.encode("utf-8"))
+    results = []
+
+    # WHEN
+    for use_mmap in (True, False):
+        report = ErrorReport()
+        quarantine = tmp_path / f"quarentena-{use_mmap}.csv"
+        rejects = tmp_path / f"rejeitos-{use_mmap}.jsonl"
+        sales = read_sales_csv(str(file_path), report, str(quarantine), str(rejects), use_mmap=use_mmap)
+        results.append((sales, report.counts, report.examples, quarantine.read_text(encoding="utf-8"), rejects.read_text(encoding="utf-8")))
+
+    # THEN
+    assert results[0] == results[1]
+    assert [s["produto"] for s in results[0][0]] == ["Produto A", "TV 5\" polegadas", "Produto, B", "Produto D", "Produto G"]
+    assert results[0][1] == {"valor_invalido": 1, "valor_negativo": 1, "data_invalida": 1, "coluna_ausente": 1}
+    assert [json.loads(line)["linha"] for line in results[0][4].splitlines()] == [7, 9, 10, 11]
+
+def test_mmap_scanner_falls_back_for_other_header_order(tmp_path):
+    # GIVEN
+    file_path = tmp_path / "ordem.csv"
+    file_path.write_text("data,produto,valor\n2025-01-15,Produto A,10\n", encoding="utf-8")
+
+    # WHEN
+    sales = read_sales_csv(str(file_path))
+
+    # THEN
+    assert sales == [Sale(produto="Produto A", valor=10.0, data=date(2025, 1, 15))]
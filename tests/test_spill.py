@@ -0,0 +1,140 @@
+import pytest
+import random
+from datetime import date
+from typing import List
+from vendas_cli.parser import Sale
+from vendas_cli.core import calculate_sales_metrics
+from vendas_cli.errors import ErrorReport
+from vendas_cli.output import format_json, format_text
+from vendas_cli.spill import SpilledTotals, SpillingAggregator, calculate_sales_metrics_spilling
+
+def make_sales(products: int, sales: int) -> List[Sale]:
+    rng = random.Random(7)
+    return [
+        Sale(produto=f"Produto {rng.randrange(products):05d}", valor=float(rng.randint(1, 500)), data=date(2025, 1, 1))
+        for _ in range(sales)
+    ]
+
+def test_spilling_matches_in_memory_metrics(tmp_path):
+    # GIVEN
+    sales = make_sales(2000, 10000)
+
+    # WHEN
+    metrics = calculate_sales_metrics_spilling(iter(sales), max_memory=20_000, tmp_dir=str(tmp_path))
+    expected = calculate_sales_metrics(sales)
+
+    # THEN
+    totals = metrics["total_por_produto"]
+    assert isinstance(totals, SpilledTotals)
+    assert len(totals) == len(expected["total_por_produto"])
+    assert dict(totals.items()) == expected["total_por_produto"]
+    assert list(totals) == sorted(expected["total_por_produto"])
+    assert totals["Produto 00042"] == expected["total_por_produto"]["Produto 00042"]
+    assert "Inexistente" not in totals
+    assert metrics["valor_total_vendas"] == expected["valor_total_vendas"]
+    assert metrics["produto_mais_vendido"] == expected["produto_mais_vendido"]
+    assert format_text(metrics) == format_text(expected)
+    totals.close()
+    assert list(tmp_path.iterdir()) == []
+
+def test_spilling_splits_oversized_partitions(tmp_path):
+    # GIVEN
+    aggregator = SpillingAggregator(max_memory=5_000, partitions=2, tmp_dir=str(tmp_path))
+    sales = make_sales(1000, 3000)
+
+    # WHEN
+    for sale in sales:
+        aggregator.add(sale["produto"], sale["valor"])
+    totals, total, best = aggregator.finish()
+    expected = calculate_sales_metrics(sales)
+
+    # THEN
+    assert aggregator.spills > 1
+    assert any(len(key) > 1 for key in totals._runs)
+    assert dict(totals.items()) == expected["total_por_produto"]
+    assert total == expected["valor_total_vendas"]
+    assert best == expected["produto_mais_vendido"]
+    assert totals["Produto 00999"] == expected["total_por_produto"]["Produto 00999"]
+    totals.close()
+
+def test_spilling_keeps_merged_partitions_within_limit(tmp_path):
+    # GIVEN
+    aggregator = SpillingAggregator(max_memory=50_000, tmp_dir=str(tmp_path))
+    sales = make_sales(50_000, 100_000)
+
+    # WHEN
+    for sale in sales:
+        aggregator.add(sale["produto"], sale["valor"])
+    totals, total, best = aggregator.finish()
+    expected = calculate_sales_metrics(sales)
+
+    # THEN
+    assert any(len(key) > 1 for key in totals._runs)
+    assert 0 < aggregator.largest_partition <= 50_000
+    assert dict(totals.items()) == expected["total_por_produto"]
+    assert best == expected["produto_mais_vendido"]
+    totals.close()
+
+def test_spilling_without_reaching_limit_returns_dict():
+    # GIVEN
+    sales = make_sales(10, 50)
+
+    # WHEN
+    metrics = calculate_sales_metrics_spilling(sales, max_memory=10 ** 9)
+
+    # THEN
+    assert type(metrics["total_por_produto"]) is dict
+    assert metrics == calculate_sales_metrics(sales)
+
+def test_spilling_keeps_running_total_and_insertion_order_ties(tmp_path):
+    # GIVEN
+    rng = random.Random(3)
+    sales = [Sale(produto=f"Produto {rng.randrange(500):03d}", valor=rng.uniform(0, 1000), data=date(2025, 1, 1)) for _ in range(5000)]
+    sales += [
+        Sale(produto="zz empate", valor=10 ** 7, data=date(2025, 1, 1)),
+        Sale(produto="aa empate", valor=10 ** 7, data=date(2025, 1, 1)),
+    ]
+    expected = calculate_sales_metrics(sales)
+
+    # WHEN
+    in_memory = calculate_sales_metrics_spilling(sales, max_memory=10 ** 9)
+    spilled = calculate_sales_metrics_spilling(sales, max_memory=3_000, tmp_dir=str(tmp_path))
+
+    # THEN
+    assert in_memory["valor_total_vendas"] == expected["valor_total_vendas"]
+    assert spilled["valor_total_vendas"] == expected["valor_total_vendas"]
+    assert in_memory["produto_mais_vendido"] == expected["produto_mais_vendido"] == ("zz empate", 10 ** 7)
+    assert spilled["produto_mais_vendido"] == expected["produto_mais_vendido"]
+    spilled["total_por_produto"].close()
+
+def test_spilling_reports_invalid_records():
+    # GIVEN
+    report = ErrorReport()
+    sales = [
+        Sale(produto="Valido", valor=10.0, data=date(2025, 1, 1)),
+        {"prod": "Invalido", "valor": 20.0, "data": date(2025, 1, 2)},
+        {"produto": "Outro", "valor": None, "data": date(2025, 1, 3)},
+    ]
+
+    # WHEN
+    metrics = calculate_sales_metrics_spilling(sales, max_memory=10 ** 9, report=report)
+
+    # THEN
+    assert metrics["total_por_produto"] == {"Valido": 10.0}
+    assert report.counts == {"registro_invalido": 1, "tipo_invalido": 1}
+
+def test_spilled_totals_json_and_pagination(tmp_path):
+    # GIVEN
+    sales = make_sales(300, 1000)
+    metrics = calculate_sales_metrics_spilling(sales, max_memory=2_000, tmp_dir=str(tmp_path))
+    expected = calculate_sales_metrics(sales)
+
+    # WHEN
+    import json
+    data = json.loads(format_json(metrics))
+    page = format_text(metrics, max_rows=10, offset=20)
+
+    # THEN
+    assert data["total_por_produto"] == expected["total_por_produto"]
+    assert page == format_text(expected, max_rows=10, offset=20)
+    metrics["total_por_produto"].close()
@@ -0,0 +1,131 @@
+import pytest
+from datetime import date
+from typing import List
+from vendas_cli.parser import Sale
+from vendas_cli.core import calculate_sales_metrics
+import sqlite3
+from vendas_cli.warehouse import connect_warehouse, ingest_file, ingest_sales, query_sales_metrics
+
+EXAMPLE_SALES: List[Sale] = [
+    Sale(produto="Produto A", valor=100.50, data=date(2025, 1, 15)),
+    Sale(produto="Produto B", valor=75.20, data=date(2025, 1, 16)),
+    Sale(produto="Produto A", valor=50.00, data=date(2025, 1, 17)),
+    Sale(produto="Produto C", valor=200.00, data=date(2025, 2, 10)),
+    Sale(produto="Produto B", valor=25.80, data=date(2025, 2, 15)),
+]
+
+# Empate entre Zeta e Alfa; o total venda a venda difere da soma por produto.
+TIED_SALES: List[Sale] = [
+    Sale(produto=product, valor=value, data=date(2025, 1, 15))
+    for product, value in [("Zeta", 10.0), ("Alfa", 10.0), ("Mid", 0.1), ("Mid", 0.2), ("Zeta", 0.1), ("Alfa", 0.1)]
+]
+
+@pytest.fixture
+def warehouse(tmp_path):
+    connection = connect_warehouse(str(tmp_path / "vendas.db"))
+    yield connection
+    connection.close()
+
+def test_ingest_sales_in_batches(warehouse):
+    # GIVEN
+    count = ingest_sales(warehouse, iter(EXAMPLE_SALES), batch_size=2)
+
+    # WHEN
+    rows = warehouse.execute("SELECT produto, valor, data FROM vendas ORDER BY rowid").fetchall()
+
+    # THEN
+    assert count == 5
+    assert rows[0] == ("Produto A", 100.50, "2025-01-15")
+    assert len(rows) == 5
+
+@pytest.mark.parametrize("sales, best", [(EXAMPLE_SALES, ("Produto C", 200.0)), (TIED_SALES, ("Zeta", 10.1))])
+def test_query_matches_calculate_sales_metrics(warehouse, sales, best):
+    # GIVEN
+    ingest_sales(warehouse, sales)
+
+    # WHEN
+    metrics = query_sales_metrics(warehouse)
+    expected = calculate_sales_metrics(sales)
+
+    # THEN
+    assert metrics["total_por_produto"] == pytest.approx(expected["total_por_produto"])
+    assert list(metrics["total_por_produto"]) == list(expected["total_por_produto"])
+    assert metrics["valor_total_vendas"] == expected["valor_total_vendas"]
+    assert metrics["produto_mais_vendido"] == expected["produto_mais_vendido"] == best
+
+def test_query_with_date_filter(warehouse):
+    # GIVEN
+    ingest_sales(warehouse, EXAMPLE_SALES)
+
+    # WHEN
+    metrics = query_sales_metrics(warehouse, date(2025, 1, 16), date(2025, 2, 10))
+    empty = query_sales_metrics(warehouse, date(2026, 1, 1))
+
+    # THEN
+    assert metrics["total_por_produto"] == pytest.approx({"Produto A": 50.0, "Produto B": 75.2, "Produto C": 200.0})
+    assert metrics["valor_total_vendas"] == pytest.approx(325.2)
+    assert empty == {"total_por_produto": {}, "valor_total_vendas": 0.0, "produto_mais_vendido": None}
+
+def test_ingest_rolls_back_on_error(warehouse):
+    # GIVEN
+    def broken_sales():
+        yield EXAMPLE_SALES[0]
+        raise ValueError("falha na leitura")
+
+    # WHEN
+    with pytest.raises(ValueError):
+        ingest_sales(warehouse, broken_sales(), batch_size=1)
+
+    # THEN
+    assert warehouse.execute("SELECT COUNT(*) FROM vendas").fetchone() == (0,)
+
+def test_ingest_file_skips_already_imported_file(warehouse, tmp_path):
+    # GIVEN
+    csv_path = tmp_path / "vendas.csv"
+    csv_path.write_text("produto,valor,data\n", encoding="utf-8")
+    first = ingest_file(warehouse, str(csv_path), iter(EXAMPLE_SALES))
+
+    # WHEN
+    second = ingest_file(warehouse, str(csv_path), iter(EXAMPLE_SALES))
+    metrics = query_sales_metrics(warehouse)
+
+    # THEN
+    assert first == 5
+    assert second is None
+    assert metrics["valor_total_vendas"] == pytest.approx(451.5)
+    assert warehouse.execute("SELECT caminho, vendas FROM arquivos").fetchall() == [(str(csv_path), 5)]
+
+def test_ingest_file_changed_requires_replace(warehouse, tmp_path):
+    # GIVEN
+    csv_path = tmp_path / "vendas.csv"
+    csv_path.write_text("produto,valor,data\n", encoding="utf-8")
+    ingest_file(warehouse, str(csv_path), iter(EXAMPLE_SALES))
+    csv_path.write_text("produto,valor,data\nX,1,2025-01-01\n", encoding="utf-8")
+
+    # WHEN
+    with pytest.raises(ValueError, match="--replace"):
+        ingest_file(warehouse, str(csv_path), iter(EXAMPLE_SALES[:1]))
+    replaced = ingest_file(warehouse, str(csv_path), iter(EXAMPLE_SALES[:1]), replace=True)
+
+    # THEN
+    assert replaced == 1
+    assert query_sales_metrics(warehouse)["total_por_produto"] == pytest.approx({"Produto A": 100.50})
+    assert warehouse.execute("SELECT vendas FROM arquivos").fetchall() == [(1,)]
+
+def test_connect_warehouse_migrates_old_schema(tmp_path):
+    # GIVEN
+    db = str(tmp_path / "antigo.db")
+    old = sqlite3.connect(db)
+    old.execute("CREATE TABLE vendas (produto TEXT NOT NULL, valor REAL NOT NULL, data TEXT NOT NULL)")
+    old.execute("INSERT INTO vendas VALUES ('Produto A', 1.0, '2025-01-01')")
+    old.commit()
+    old.close()
+
+    # WHEN
+    connection = connect_warehouse(db)
+    ingest_sales(connection, EXAMPLE_SALES[:1])
+
+    # THEN
+    assert connection.execute("SELECT arquivo_id FROM vendas").fetchall() == [(None,), (None,)]
+    assert query_sales_metrics(connection)["total_por_produto"] == pytest.approx({"Produto A": 101.5})
+    connection.close()
@@ -0,0 +1,158 @@
+import io
+import json
+import os
+import pytest
+from vendas_cli.errors import ErrorReport
+from vendas_cli.parser import read_sales_csv
+from vendas_cli.watch import CsvTail, make_renderer, watch_sales
+
+HEADER = "produto,valor,data\n"
+
+def append(path, text):
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(text)
+
+def test_tail_reads_only_new_complete_lines(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(HEADER + "ProdA,10,2025-01-15\nProdB,5,2025-01", encoding="utf-8")
+    tail = CsvTail(str(path))
+
+    # WHEN
+    first = tail.poll()
+    append(path, "-16\n")
+    second = tail.poll()
+    third = tail.poll()
+    tail.close()
+
+    # THEN
+    assert [s["produto"] for s in first] == ["ProdA"]
+    assert [s["produto"] for s in second] == ["ProdB"]
+    assert third == []
+
+def test_tail_handles_rotation_and_truncation(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(HEADER + "ProdA,10,2025-01-15\n", encoding="utf-8")
+    tail = CsvTail(str(path))
+    tail.poll()
+
+    # WHEN
+    append(path, "ProdB,1,2025-01-16\n")
+    os.rename(path, tmp_path / "vendas.csv.1")
+    path.write_text(HEADER + "ProdC,2,2025-01-17\n", encoding="utf-8")
+    rotated = tail.poll()
+    path.write_text("", encoding="utf-8")
+    truncated = tail.poll()
+    append(path, HEADER + "ProdD,3,2025-01-18\n")
+    truncated += tail.poll()
+    tail.close()
+
+    # THEN
+    assert [s["produto"] for s in rotated] == ["ProdB", "ProdC"]
+    assert [s["produto"] for s in truncated] == ["ProdD"]
+
+def test_tail_multiline_record_and_errors(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(HEADER + '"Prod\nA","1,5",2025-01-15\nProdB,abc,2025-01-16\n', encoding="utf-8")
+    report = ErrorReport()
+    tail = CsvTail(str(path), report)
+
+    # WHEN
+    sales = tail.poll()
+    tail.close()
+
+    # THEN
+    assert [(s["produto"], s["valor"]) for s in sales] == [("Prod\nA", 1.5)]
+    assert report.counts == {"valor_invalido": 1}
+
+def test_tail_literal_quote_inside_field(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(
+        HEADER + 'TV 5" A,10,2025-01-15\nB,2,2025-01-16\n"C ""x""\ny",3,2025-01-17\nTV 7" D,4,2025-01-18\nE,5,2025-01-19\n',
+        encoding="utf-8"
+    )
+    report = ErrorReport()
+    tail = CsvTail(str(path), report)
+
+    # WHEN
+    sales = tail.poll()
+    tail.close()
+
+    # THEN
+    assert sales == read_sales_csv(str(path))
+    assert [s["produto"] for s in sales] == ['TV 5" A', "B", 'C "x"\ny', 'TV 7" D', "E"]
+    assert report.counts == {}
+
+def test_tail_waits_for_missing_file(tmp_path):
+    # GIVEN
+    path = tmp_path / "ainda_nao_existe.csv"
+    tail = CsvTail(str(path))
+
+    # WHEN
+    before = tail.poll()
+    path.write_text(HEADER + "ProdA,10,2025-01-15\n", encoding="utf-8")
+    after = tail.poll()
+    tail.close()
+
+    # THEN
+    assert before == []
+    assert len(after) == 1
+
+def test_tail_invalid_header(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text("item,preco,quando\n", encoding="utf-8")
+    tail = CsvTail(str(path))
+
+    # WHEN/THEN
+    with pytest.raises(ValueError, match="Cabeçalhos ausentes no CSV"):
+        tail.poll()
+    tail.close()
+
+def test_watch_sales_renders_debounced(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(HEADER + "ProdA,10,2025-01-15\n", encoding="utf-8")
+    now = [0.0]
+    renders = []
+    new_lines = iter(["ProdB,20,2025-01-16\n", "ProdA,15,2025-01-17\n", "", "ProdC,1,2024-12-31\n"])
+
+    def fake_sleep(seconds):
+        now[0] += seconds
+        append(path, next(new_lines, ""))
+
+    def render(accumulator):
+        renders.append((now[0], dict(accumulator.total_per_product), accumulator.best_selling_product))
+
+    # WHEN
+    accumulator = watch_sales(
+        str(path), render, interval=2.0, poll_interval=1.0, start_date=__import__("datetime").date(2025, 1, 1),
+        max_polls=6, sleep=fake_sleep, clock=lambda: now[0]
+    )
+
+    # THEN
+    assert renders == [
+        (0.0, {"ProdA": 10.0}, ("ProdA", 10.0)),
+        (2.0, {"ProdA": 25.0, "ProdB": 20.0}, ("ProdA", 25.0)),
+    ]
+    assert accumulator.count == 3
+    assert accumulator.sales_total_value == 45.0
+
+def test_make_renderer_json_snapshot(tmp_path):
+    # GIVEN
+    path = tmp_path / "vendas.csv"
+    path.write_text(HEADER + "ProdA,10,2025-01-15\n", encoding="utf-8")
+    stream = io.StringIO()
+
+    # WHEN
+    watch_sales(str(path), make_renderer(stream, "json"), max_polls=1)
+
+    # THEN
+    assert json.loads(stream.getvalue()) == {
+        "total_por_produto": {"ProdA": 10.0},
+        "valor_total_vendas": 10.0,
+        "produto_mais_vendido": {"produto": "ProdA", "valor_total": 10.0}
+    }
@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+from array import array
+from collections.abc import ItemsView, Mapping
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from vendas_cli.core import SaleMetrics
+from vendas_cli.errors import ErrorReport
+from vendas_cli.parser import EncodedSale
+
+logger = logging.getLogger(__name__)
+
+
+def _lock(file: BinaryIO, exclusive: bool) -> None:
+    try:
+        import fcntl
+    except ImportError:  # Windows: sem flock, execuções simultâneas não são protegidas
+        return
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+# Dicionário de produtos: cada nome recebe um ID inteiro denso. O arquivo
+# guarda um nome por linha (string JSON) e o ID é a posição do nome entre os
+# nomes distintos do arquivo; como `save` só acrescenta nomes ao final, um
+# produto mantém o mesmo ID entre execuções. Nomes novos recebem um ID
+# provisório em `encode`, que vira definitivo em `save`.
+class ProductCatalog:
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._saved = 0
+        self._offset = 0
+        self._lines = 0
+        if path is not None and os.path.exists(path):
+            with open(path, mode='rb') as file:
+                _lock(file, exclusive=False)
+                self._read_new_names(file, self.names, self.ids)
+            self._saved = len(self.names)
+            logger.info("Catálogo de produtos %s carregado: %d produtos.", path, len(self.names))
+
+    # Lê as linhas gravadas depois de `_offset`. Um nome repetido (gravado
+    # por uma versão antiga sem trava) mantém o ID da primeira ocorrência.
+    def _read_new_names(self, file: BinaryIO, names: List[str], ids: Dict[str, int]) -> None:
+        file.seek(self._offset)
+        data = file.read()
+        lines = data.split(b"\n")
+        if lines[-1]:
+            raise ValueError(f"Catálogo de produtos inválido em {self.path}, linha {self._lines + len(lines)}: linha incompleta.")
+        for line in lines[:-1]:
+            self._lines += 1
+            try:
+                name = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Catálogo de produtos inválido em {self.path}, linha {self._lines}: {e}") from None
+            if not isinstance(name, str):
+                raise ValueError(f"Catálogo de produtos inválido em {self.path}, linha {self._lines}: nome ausente.")
+            if name not in ids:
+                ids[name] = len(names)
+                names.append(name)
+        self._offset += len(data)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def encode(self, name: str) -> int:
+        product_id = self.ids.get(name)
+        if product_id is None:
+            product_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return product_id
+
+    # Sob trava exclusiva, incorpora os nomes que outras execuções gravaram
+    # desde a carga e acrescenta só os nomes novos que ainda faltam. Como isso
+    # pode mudar IDs provisórios, `names` e `ids` são trocados por novos
+    # objetos: quem guardou os anteriores (CatalogTotals) continua coerente.
+    def save(self) -> int:
+        if self.path is None or self._saved == len(self.names):
+            return 0
+        names = self.names[:self._saved]
+        ids = {name: product_id for product_id, name in enumerate(names)}
+        with open(self.path, mode='ab+') as file:
+            _lock(file, exclusive=True)
+            self._read_new_names(file, names, ids)
+            added = [name for name in self.names[self._saved:] if name not in ids]
+            for name in added:
+                ids[name] = len(names)
+                names.append(name)
+            if added:
+                data = "".join(json.dumps(name, ensure_ascii=False) + "\n" for name in added).encode('utf-8')
+                file.write(data)
+                file.flush()
+                self._offset += len(data)
+                self._lines += len(added)
+        self.names = names
+        self.ids = ids
+        self._saved = len(names)
+        logger.info("%d produtos novos acrescentados ao catálogo %s.", len(added), self.path)
+        return len(added)
+
+
+# Totais indexados por ID de produto, expostos como Mapping de nome para
+# total para ser usado como `total_por_produto` em SaleMetrics. Os nomes só
+# são buscados no catálogo quando o relatório percorre os itens.
+class CatalogTotals(Mapping):
+    def __init__(self, catalog: ProductCatalog, totals: 'array[float]', seen: bytearray, order: 'array[int]') -> None:
+        # Guarda os objetos atuais do catálogo: um `save` posterior os troca
+        # e pode renumerar IDs provisórios.
+        self._names = catalog.names
+        self._ids = catalog.ids
+        self._totals = totals
+        self._seen = seen
+        self._order = order
+
+    def __iter__(self) -> Iterator[str]:
+        names = self._names
+        return (names[product_id] for product_id in self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __getitem__(self, product: str) -> float:
+        product_id = self._ids.get(product)
+        if product_id is None or product_id >= len(self._seen) or not self._seen[product_id]:
+            raise KeyError(product)
+        return self._totals[product_id]
+
+    def items(self) -> ItemsView:
+        return _CatalogItemsView(self)
+
+
+class _CatalogItemsView(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        names = self._mapping._names
+        totals = self._mapping._totals
+        return ((names[product_id], totals[product_id]) for product_id in self._mapping._order)
+
+
+def calculate_encoded_sales_metrics(sales: Iterable[EncodedSale], catalog: ProductCatalog, report: Optional[ErrorReport] = None) -> SaleMetrics:
+    own_report = report is None
+    if report is None:
+        report = ErrorReport()
+
+    # `order` guarda os IDs na ordem da primeira venda, a mesma ordem de
+    # inserção do dict de calculate_sales_metrics.
+    totals = array('d')
+    seen = bytearray()
+    order = array('q')
+    sales_total_value = 0.0
+    for sale in sales:
+        try:
+            product_id = sale['produto_id']
+            value = sale['valor']
+            if product_id >= len(totals):
+                grow = max(len(catalog), product_id + 1) - len(totals)
+                totals.frombytes(bytes(grow * totals.itemsize))
+                seen.extend(bytes(grow))
+            totals[product_id] += value
+            sales_total_value += value
+            if not seen[product_id]:
+                seen[product_id] = 1
+                order.append(product_id)
+        except KeyError as e:
+            report.record('registro_invalido', logger, "Registro de venda inválido encontrado durante o cálculo: %s. Chave ausente: %s. Ignorando registro.", sale, e)
+        except TypeError as e:
+            report.record('tipo_invalido', logger, "Registro de venda com tipo inválido encontrado: %s. Erro: %s. Ignorando registro.", sale, e)
+
+    if own_report:
+        report.log_summary(logger)
+
+    best_selling_product: Optional[Tuple[str, float]] = None
+    best_id = -1
+    for product_id in order:
+        if best_id < 0 or totals[product_id] > totals[best_id]:
+            best_id = product_id
+    if best_id >= 0:
+        best_selling_product = (catalog.names[best_id], totals[best_id])
+        logger.info("Produto mais vendido: %s com total de R$ %.2f", best_selling_product[0], best_selling_product[1])
+
+    logger.info("Cálculo de métricas concluído. Valor total: R$ %.2f", sales_total_value)
+    return {
+        'total_por_produto': CatalogTotals(catalog, totals, seen, order),
+        'valor_total_vendas': sales_total_value,
+        'produto_mais_vendido': best_selling_product
+    }
@@ -1,39 +1,95 @@
 import argparse
 import logging
+import os
 import sys
 from datetime import datetime, date
-from typing import Optional, Sequence
+from typing import TYPE_CHECKING, Optional, Sequence
 
-from vendas_cli.parser import read_sales_csv, Sale
-from vendas_cli.core import calculate_sales_metrics
-from vendas_cli.output import filter_sales_by_date, generate_report
+from vendas_cli.errors import DEFAULT_MAX_EXAMPLES, ErrorReport
+
+if TYPE_CHECKING:
+    from vendas_cli.core import SaleMetrics
 
 log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-logging.basicConfig(level=logging.INFO, format=log_format)
 logger = logging.getLogger(__name__)
 
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
 def validate_date(date_str: str) -> date:
     try:
         return datetime.strptime(date_str, '%Y-%m-%d').date()
     except ValueError:
         raise argparse.ArgumentTypeError(f"Formato de data inválido: 	{date_str}	. Use AAAA-MM-DD.")
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    parser = argparse.ArgumentParser(
-        description="Processa um arquivo CSV de vendas e gera relatórios.",
-        formatter_class=argparse.RawDescriptionHelpFormatter
-    )
+def positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"Valor inválido: {value}. Use um inteiro maior que zero.")
+    return number
 
-    parser.add_argument(
-        "arquivo_csv",
-        help="Caminho para o arquivo CSV de vendas."
-    )
+def positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"Valor inválido: {value}. Use um número maior que zero.")
+    return number
+
+MEMORY_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+def memory_size(value: str) -> int:
+    text = value.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in MEMORY_UNITS else ""
+    try:
+        number = float(text[:len(text) - len(unit)])
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"Tamanho de memória inválido: {value}. Use, por exemplo, 512M ou 2G.")
+    return int(number * MEMORY_UNITS[unit])
+
+def non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"Valor inválido: {value}. Use um inteiro maior ou igual a zero.")
+    return number
 
+def _add_report_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--format",
-        choices=["text", "json"],
+        choices=["text", "json", "ndjson"],
         default="text",
-        help="Formato de saída do relatório (padrão: text)."
+        help="Formato de saída do relatório (padrão: text). `ndjson` emite um objeto JSON por produto e uma linha final de resumo."
+    )
+    parser.add_argument(
+        "-o", "--output",
+        metavar="ARQUIVO",
+        help="Grava o relatório no arquivo informado em vez da saída padrão."
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Gera o JSON sem indentação (apenas para --format json)."
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=positive_int,
+        metavar="N",
+        help="Exibe no máximo N produtos na tabela do relatório texto."
+    )
+    parser.add_argument(
+        "--page",
+        type=positive_int,
+        default=1,
+        metavar="P",
+        help="Página da tabela a exibir, com --max-rows produtos por página (padrão: 1)."
     )
     parser.add_argument(
         "--start",
@@ -45,51 +101,389 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         type=validate_date,
         help="Data de fim para filtrar vendas (formato AAAA-MM-DD)."
     )
+
+def _add_verbose_argument(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Aumenta o nível de log para DEBUG."
     )
 
-    args = parser.parse_args(argv)
+def _add_mmap_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--no-mmap",
+        dest="use_mmap",
+        action="store_false",
+        help="Lê o CSV sempre pelo módulo csv, sem o leitor por mmap do layout padrão produto,valor,data."
+    )
+
+def _page_offset(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    if args.page > 1 and args.max_rows is None:
+        parser.error("--page exige --max-rows.")
+    return (args.page - 1) * (args.max_rows or 0)
 
+def _configure_logging(args: argparse.Namespace) -> None:
+    logging.basicConfig(level=logging.INFO, format=log_format)
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Logging configurado para DEBUG.")
 
-    logger.info(f"Iniciando processamento do arquivo: {args.arquivo_csv}")
-    logger.debug(f"Argumentos recebidos: {args}")
+def _write_metrics(metrics: 'SaleMetrics', args: argparse.Namespace, offset: int) -> None:
+    from vendas_cli.output import write_report
+
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as output_file:
+            write_report(metrics, args.format, output_file, not args.compact, args.max_rows, offset)
+    else:
+        write_report(metrics, args.format, sys.stdout, not args.compact, args.max_rows, offset)
+
+def _calculate_metrics(args: argparse.Namespace, error_report: ErrorReport) -> Optional['SaleMetrics']:
+    # Importados somente após o parse dos argumentos: `--help` e erros de uso
+    # não pagam o custo de carregar o restante do pacote.
+    from vendas_cli.parser import read_sales_csv
+    from vendas_cli.core import calculate_sales_metrics
+    from vendas_cli.output import filter_sales_by_date
+
+    gross_sales = read_sales_csv(args.arquivo_csv, error_report, args.quarantine, args.rejects, args.use_mmap)
 
+    sales_filtered = filter_sales_by_date(gross_sales, args.start, args.end, error_report)
+
+    if not sales_filtered:
+        return None
+
+    return calculate_sales_metrics(sales_filtered, error_report)
+
+def _calculate_metrics_bounded(args: argparse.Namespace, error_report: ErrorReport) -> Optional['SaleMetrics']:
+    # Leitura, filtro e agregação encadeados venda a venda: nenhuma lista de
+    # vendas é montada e a tabela de produtos respeita --max-memory.
+    from vendas_cli.parser import iter_sales_csv
+    from vendas_cli.output import iter_sales_by_date
+    from vendas_cli.spill import calculate_sales_metrics_spilling
+
+    sales = iter_sales_by_date(
+        iter_sales_csv(args.arquivo_csv, error_report, args.quarantine, args.rejects, args.use_mmap),
+        args.start, args.end, error_report
+    )
+    metrics = calculate_sales_metrics_spilling(sales, args.max_memory, error_report)
+    if not metrics["total_por_produto"]:
+        return None
+    return metrics
+
+def _calculate_metrics_encoded(args: argparse.Namespace, error_report: ErrorReport) -> Optional['SaleMetrics']:
+    # Cada venda carrega só o ID do produto; os nomes voltam a ser strings
+    # apenas quando o relatório é escrito.
+    from vendas_cli.catalog import ProductCatalog, calculate_encoded_sales_metrics
+    from vendas_cli.parser import iter_encoded_sales_csv
+    from vendas_cli.output import iter_sales_by_date
+
+    catalog = ProductCatalog(args.catalog)
+    sales = iter_sales_by_date(
+        iter_encoded_sales_csv(args.arquivo_csv, catalog, error_report, args.quarantine, args.rejects, args.use_mmap),
+        args.start, args.end, error_report
+    )
+    metrics = calculate_encoded_sales_metrics(sales, catalog, error_report)
+    catalog.save()
+    if not metrics["total_por_produto"]:
+        return None
+    return metrics
+
+def ingest_main(argv: Sequence[str]) -> int:
+    from vendas_cli.parser import iter_sales_csv
+    from vendas_cli.warehouse import DEFAULT_BATCH_SIZE, connect_warehouse, ingest_file
+
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli ingest",
+        description="Valida arquivos CSV de vendas e grava as vendas válidas em um banco SQLite local."
+    )
+    parser.add_argument(
+        "arquivos_csv",
+        nargs="+",
+        help="Arquivo(s) CSV de vendas a importar."
+    )
+    parser.add_argument(
+        "--db",
+        required=True,
+        metavar="ARQUIVO",
+        help="Banco SQLite de destino (criado se não existir)."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help=f"Quantidade de vendas por lote de inserção (padrão: {DEFAULT_BATCH_SIZE})."
+    )
+    parser.add_argument(
+        "--max-error-examples",
+        type=non_negative_int,
+        default=DEFAULT_MAX_EXAMPLES,
+        metavar="N",
+        help=f"Quantidade de exemplos logados por categoria de erro (padrão: {DEFAULT_MAX_EXAMPLES})."
+    )
+    parser.add_argument(
+        "--replace",
+        action="store_true",
+        help="Substitui as vendas de arquivos já importados em vez de ignorá-los."
+    )
+    _add_mmap_argument(parser)
+    _add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    _configure_logging(args)
+
+    error_report = ErrorReport(args.max_error_examples)
     try:
-        gross_sales = read_sales_csv(args.arquivo_csv)
+        connection = connect_warehouse(args.db)
+        try:
+            for file_path in args.arquivos_csv:
+                sales = iter_sales_csv(file_path, error_report, use_mmap=args.use_mmap)
+                count = ingest_file(connection, file_path, sales, args.batch_size, args.replace)
+                if count is None:
+                    print(f"{file_path} já foi importado para {args.db}; ignorado.")
+                else:
+                    print(f"{count} vendas de {file_path} importadas para {args.db}.")
+        finally:
+            connection.close()
+        return 0
+
+    except FileNotFoundError as e:
+        logger.error("Erro: Arquivo não encontrado: %s", e.filename)
+        print(f"Erro: Arquivo não encontrado: {e.filename}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        logger.error("Erro de valor ou formato nos dados: %s", e)
+        print(f"Erro nos dados do arquivo ou argumentos: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        logger.exception("Ocorreu um erro inesperado durante a importação: %s", e)
+        print(f"Erro inesperado: {e}", file=sys.stderr)
+        return 1
+    finally:
+        error_report.log_summary(logger)
 
-        sales_filtered = filter_sales_by_date(gross_sales, args.start, args.end)
+def query_main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli query",
+        description="Gera o relatório de vendas a partir do banco SQLite criado por `vendas-cli ingest`."
+    )
+    parser.add_argument(
+        "--db",
+        required=True,
+        metavar="ARQUIVO",
+        help="Banco SQLite criado por `vendas-cli ingest`."
+    )
+    _add_report_arguments(parser)
+    _add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    offset = _page_offset(parser, args)
+    _configure_logging(args)
 
-        if not sales_filtered:
-            logger.warning("Nenhuma venda encontrada para o período especificado (ou o arquivo estava vazio/inválido).")
+    if not os.path.exists(args.db):
+        print(f"Erro: Banco não encontrado: {args.db}", file=sys.stderr)
+        return 1
+
+    from vendas_cli.warehouse import connect_warehouse, query_sales_metrics
+
+    try:
+        connection = connect_warehouse(args.db)
+        try:
+            metrics = query_sales_metrics(connection, args.start, args.end)
+        finally:
+            connection.close()
+
+        if not metrics["total_por_produto"]:
             print("Nenhuma venda encontrada para processar com os filtros aplicados.", file=sys.stderr)
-            return 1 
+            return 1
+
+        _write_metrics(metrics, args, offset)
+        return 0
+
+    except Exception as e:
+        logger.exception("Ocorreu um erro inesperado durante a consulta: %s", e)
+        print(f"Erro inesperado: {e}", file=sys.stderr)
+        return 1
+
+def watch_main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="vendas-cli watch",
+        description="Acompanha um CSV de vendas que recebe novas linhas e mantém o relatório atualizado."
+    )
+    parser.add_argument(
+        "arquivo_csv",
+        help="Arquivo CSV de vendas a acompanhar."
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Formato do relatório (padrão: text). Em `json`, cada atualização é uma linha com o JSON compacto."
+    )
+    parser.add_argument(
+        "--interval",
+        type=positive_float,
+        default=2.0,
+        metavar="SEGUNDOS",
+        help="Intervalo mínimo entre atualizações do relatório (padrão: 2)."
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=positive_float,
+        default=0.5,
+        metavar="SEGUNDOS",
+        help="Intervalo entre verificações de novas linhas no arquivo (padrão: 0.5)."
+    )
+    parser.add_argument(
+        "--start",
+        type=validate_date,
+        help="Data de início para filtrar vendas (formato AAAA-MM-DD)."
+    )
+    parser.add_argument(
+        "--end",
+        type=validate_date,
+        help="Data de fim para filtrar vendas (formato AAAA-MM-DD)."
+    )
+    parser.add_argument(
+        "--max-error-examples",
+        type=non_negative_int,
+        default=DEFAULT_MAX_EXAMPLES,
+        metavar="N",
+        help=f"Quantidade de exemplos logados por categoria de erro (padrão: {DEFAULT_MAX_EXAMPLES})."
+    )
+    _add_verbose_argument(parser)
+    args = parser.parse_args(argv)
+    _configure_logging(args)
 
-        metrics = calculate_sales_metrics(sales_filtered)
+    from vendas_cli.watch import make_renderer, watch_sales
 
-        report = generate_report(metrics, args.format)
+    error_report = ErrorReport(args.max_error_examples)
+    try:
+        watch_sales(
+            args.arquivo_csv,
+            make_renderer(sys.stdout, args.format),
+            interval=args.interval,
+            poll_interval=args.poll_interval,
+            start_date=args.start,
+            end_date=args.end,
+            report=error_report,
+        )
+        return 0
+    except KeyboardInterrupt:
+        return 0
+    except ValueError as e:
+        logger.error("Erro de valor ou formato nos dados: %s", e)
+        print(f"Erro nos dados do arquivo ou argumentos: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        logger.exception("Ocorreu um erro inesperado durante o acompanhamento: %s", e)
+        print(f"Erro inesperado: {e}", file=sys.stderr)
+        return 1
+    finally:
+        error_report.log_summary(logger)
+
+COMMANDS = {
+    "ingest": ingest_main,
+    "query": query_main,
+    "watch": watch_main,
+}
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Processa um arquivo CSV de vendas e gera relatórios.",
+        epilog=(
+            "Subcomandos: `vendas-cli ingest` grava vendas em um banco SQLite; `vendas-cli query` gera o relatório a partir dele; "
+            "`vendas-cli watch` acompanha um CSV em crescimento."
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument(
+        "arquivo_csv",
+        help="Caminho para o arquivo CSV de vendas."
+    )
+
+    _add_report_arguments(parser)
+    parser.add_argument(
+        "--max-error-examples",
+        type=non_negative_int,
+        default=DEFAULT_MAX_EXAMPLES,
+        metavar="N",
+        help=f"Quantidade de exemplos logados por categoria de erro; os demais só entram no resumo final (padrão: {DEFAULT_MAX_EXAMPLES})."
+    )
+    parser.add_argument(
+        "--quarantine",
+        metavar="ARQUIVO",
+        help="Grava as linhas rejeitadas, com o cabeçalho original, em um CSV de quarentena."
+    )
+    aggregation = parser.add_mutually_exclusive_group()
+    aggregation.add_argument(
+        "--max-memory",
+        type=memory_size,
+        metavar="TAMANHO",
+        help="Limite aproximado de memória para a tabela de produtos (ex.: 512M, 2G). Acima dele, totais parciais são gravados em arquivos temporários."
+    )
+    aggregation.add_argument(
+        "--catalog",
+        metavar="ARQUIVO",
+        help="Catálogo de produtos persistente (criado se não existir): cada produto vira um ID inteiro estável entre execuções e a agregação é feita por ID."
+    )
+    parser.add_argument(
+        "--rejects",
+        metavar="ARQUIVO",
+        help="Grava cada linha rejeitada com número da linha e código do motivo (JSONL se o arquivo terminar em .jsonl/.ndjson, senão CSV)."
+    )
+    _add_mmap_argument(parser)
+    _add_verbose_argument(parser)
+
+    args = parser.parse_args(argv)
+    offset = _page_offset(parser, args)
+    _configure_logging(args)
+
+    logger.info("Iniciando processamento do arquivo: %s", args.arquivo_csv)
+    logger.debug("Argumentos recebidos: %s", args)
+
+    error_report = ErrorReport(args.max_error_examples)
+    try:
+        if args.max_memory is not None:
+            metrics = _calculate_metrics_bounded(args, error_report)
+        elif args.catalog is not None:
+            metrics = _calculate_metrics_encoded(args, error_report)
+        else:
+            metrics = _calculate_metrics(args, error_report)
+
+        if metrics is None:
+            logger.warning("Nenhuma venda encontrada para o período especificado (ou o arquivo estava vazio/inválido).")
+            print("Nenhuma venda encontrada para processar com os filtros aplicados.", file=sys.stderr)
+            return 1 
 
-        print(report)
+        try:
+            _write_metrics(metrics, args, offset)
+        finally:
+            close = getattr(metrics["total_por_produto"], "close", None)
+            if close is not None:
+                close()
         logger.info("Relatório gerado com sucesso.")
         return 0
 
-    except FileNotFoundError:
-        logger.error(f"Erro: O arquivo CSV 	{args.arquivo_csv}	 não foi encontrado.")
-        print(f"Erro: Arquivo não encontrado: {args.arquivo_csv}", file=sys.stderr)
+    except FileNotFoundError as e:
+        # Pode ser o CSV de entrada ou um caminho de saída (-o, --quarantine,
+        # --rejects, --catalog) em um diretório inexistente.
+        filename = e.filename if e.filename is not None else args.arquivo_csv
+        logger.error("Erro: Arquivo não encontrado: %s", filename)
+        print(f"Erro: Arquivo não encontrado: {filename}", file=sys.stderr)
         return 1
     except ValueError as e:
-        logger.error(f"Erro de valor ou formato nos dados: {e}")
+        logger.error("Erro de valor ou formato nos dados: %s", e)
         print(f"Erro nos dados do arquivo ou argumentos: {e}", file=sys.stderr)
         return 1
     except Exception as e:
-        logger.exception(f"Ocorreu um erro inesperado durante o processamento: {e}") # Usar exception para incluir traceback no log
+        logger.exception("Ocorreu um erro inesperado durante o processamento: %s", e) # Usar exception para incluir traceback no log
         print(f"Erro inesperado: {e}", file=sys.stderr)
         return 1
+    finally:
+        error_report.log_summary(logger)
 
 if __name__ == "__main__":
     sys.exit(main())
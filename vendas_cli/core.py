@@ -1,29 +1,47 @@
 from typing import List, Dict, Tuple, Optional, TypedDict
 from collections import defaultdict
+from collections.abc import ItemsView
 import logging
 from datetime import date
 
+from vendas_cli.errors import ErrorReport
+
+logger = logging.getLogger(__name__)
+
 class Sale(TypedDict):
     produto: str
     valor: float
     data: date
 
 class SaleMetrics(TypedDict):
+    # Um dict comum, ou um Mapping equivalente (ex.: vendas_cli.spill.SpilledTotals)
+    # quando a tabela de produtos não cabe em memória.
     total_por_produto: Dict[str, float]
     valor_total_vendas: float
     produto_mais_vendido: Optional[Tuple[str, float]]
 
 
-def calculate_sales_metrics(sales: List[Sale]) -> SaleMetrics:
-    logging.info(f"Iniciando cálculo de métricas para {len(sales)} s.")
+# Visão de itens cuja iteração já sai ordenada por produto. Os relatórios
+# usam esse tipo para percorrer os itens diretamente, sem sorted().
+class SortedItemsView(ItemsView):
+    pass
+
+
+def calculate_sales_metrics(sales: List[Sale], report: Optional[ErrorReport] = None) -> SaleMetrics:
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Iniciando cálculo de métricas para %d vendas.", len(sales))
     if not sales:
-        logging.warning("Lista de vendas vazia. Retornando métricas zeradas.")
+        logger.warning("Lista de vendas vazia. Retornando métricas zeradas.")
         return {
             'total_por_produto': {},
             'valor_total_vendas': 0.0,
             'produto_mais_vendido': None
         }
 
+    own_report = report is None
+    if report is None:
+        report = ErrorReport()
+
     total_per_product: Dict[str, float] = defaultdict(float)
     sales_total_value: float = 0.0
 
@@ -35,18 +53,21 @@ def calculate_sales_metrics(sales: List[Sale]) -> SaleMetrics:
             total_per_product[product] += value
             sales_total_value += value
         except KeyError as e:
-            logging.warning(f"Registro de venda inválido encontrado durante o cálculo: {sale}. Chave ausente: {e}. Ignorando registro.")
+            report.record('registro_invalido', logger, "Registro de venda inválido encontrado durante o cálculo: %s. Chave ausente: %s. Ignorando registro.", sale, e)
         except TypeError as e:
-             logging.warning(f"Registro de venda com tipo inválido encontrado: {sale}. Erro: {e}. Ignorando registro.")
+            report.record('tipo_invalido', logger, "Registro de venda com tipo inválido encontrado: %s. Erro: %s. Ignorando registro.", sale, e)
+
+    if own_report:
+        report.log_summary(logger)
 
     best_selling_product: Optional[Tuple[str, float]] = None
     if total_per_product:
         best_selling_product = max(total_per_product.items(), key=lambda item: item[1])
-        logging.info(f"Produto mais vendido: {best_selling_product[0]} com total de R$ {best_selling_product[1]:.2f}")
+        logger.info("Produto mais vendido: %s com total de R$ %.2f", best_selling_product[0], best_selling_product[1])
     else:
-        logging.info("Nenhum produto encontrado para determinar o mais vendido.")
+        logger.info("Nenhum produto encontrado para determinar o mais vendido.")
 
-    logging.info(f"Cálculo de métricas concluído. Valor total: R$ {sales_total_value:.2f}")
+    logger.info("Cálculo de métricas concluído. Valor total: R$ %.2f", sales_total_value)
 
     metrics: SaleMetrics = {
         'total_por_produto': dict(total_per_product),
@@ -56,6 +77,46 @@ def calculate_sales_metrics(sales: List[Sale]) -> SaleMetrics:
     
     return metrics
 
+# Totais mantidos incrementalmente, venda a venda (usado pelo modo watch).
+# Como valores negativos são rejeitados na leitura, o total de um produto só
+# cresce e o mais vendido pode ser atualizado em O(1) a cada venda (exceto
+# em empates, resolvidos pela ordem de inserção como no relatório normal).
+class SalesAccumulator:
+    def __init__(self) -> None:
+        self.total_per_product: Dict[str, float] = {}
+        self.sales_total_value = 0.0
+        self.best_selling_product: Optional[Tuple[str, float]] = None
+        self.count = 0
+
+    def add(self, sale: Sale) -> None:
+        product = sale['produto']
+        value = sale['valor']
+        total = self.total_per_product.get(product, 0.0) + value
+        self.total_per_product[product] = total
+        self.sales_total_value += value
+        self.count += 1
+        best = self.best_selling_product
+        if best is None or total > best[1] or (total == best[1] and self._inserted_before(product, best[0])):
+            self.best_selling_product = (product, total)
+
+    def _inserted_before(self, product: str, other: str) -> bool:
+        # Desempate igual ao max() de calculate_sales_metrics: entre totais
+        # iguais vence o produto que apareceu primeiro. Só roda em empates.
+        for name in self.total_per_product:
+            if name == product:
+                return True
+            if name == other:
+                return False
+        return False
+
+    def metrics(self) -> SaleMetrics:
+        # Sem cópia: o dicionário retornado continua sendo atualizado.
+        return {
+            'total_por_produto': self.total_per_product,
+            'valor_total_vendas': self.sales_total_value,
+            'produto_mais_vendido': self.best_selling_product
+        }
+
 if __name__ == '__main__':
     example_sales: List[Sale] = [
         {'produto': 'Produto A', 'valor': 100.50, 'data': date(2025, 1, 15)},
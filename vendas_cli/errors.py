@@ -0,0 +1,90 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+DEFAULT_MAX_EXAMPLES = 5
+
+
+class RejectedRowError(ValueError):
+    def __init__(self, reason: str, message: str) -> None:
+        super().__init__(message)
+        self.reason = reason
+
+
+# Contabiliza registros rejeitados por categoria. Apenas os primeiros
+# `max_examples` de cada categoria são logados individualmente (`None` loga
+# todos); o restante só incrementa o contador e aparece em `log_summary`.
+class ErrorReport:
+    def __init__(self, max_examples: Optional[int] = DEFAULT_MAX_EXAMPLES) -> None:
+        self.max_examples = max_examples
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[str]] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def record(self, category: str, logger: logging.Logger, msg: str, *args: Any) -> None:
+        count = self.counts.get(category, 0) + 1
+        self.counts[category] = count
+        if self.max_examples is not None and count > self.max_examples:
+            return
+        # A mensagem só é formatada para os exemplos guardados/logados.
+        self.examples.setdefault(category, []).append(msg % args if args else msg)
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(msg, *args)
+
+    def log_summary(self, logger: logging.Logger) -> None:
+        if not self.counts or not logger.isEnabledFor(logging.WARNING):
+            return
+        details = ", ".join(f"{category}: {count}" for category, count in sorted(self.counts.items()))
+        omitted = self.total - sum(len(examples) for examples in self.examples.values())
+        if omitted:
+            logger.warning(
+                "Resumo de erros: %d registro(s) ignorado(s) (%s). %d ocorrência(s) não exibida(s) individualmente.",
+                self.total, details, omitted,
+            )
+        else:
+            logger.warning("Resumo de erros: %d registro(s) ignorado(s) (%s).", self.total, details)
+
+
+REJECTS_BUFFER_SIZE = 1024 * 1024
+
+REJECTS_HEADER = ['linha', 'motivo', 'conteudo']
+
+
+# Grava cada linha rejeitada (número da linha, código do motivo e texto bruto)
+# em CSV ou JSONL, à medida que o parser a encontra. O arquivo usa um buffer
+# grande para que a auditoria não vire uma escrita por linha.
+class RejectsWriter:
+    def __init__(self, path: str, format: Optional[str] = None) -> None:
+        if format is None:
+            format = 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+        if format not in ('csv', 'jsonl'):
+            raise ValueError(f"Formato de arquivo de rejeitos inválido: {format}. Use 'csv' ou 'jsonl'.")
+        self.format = format
+        self.count = 0
+        self._file = open(path, mode='w', encoding='utf-8', newline='', buffering=REJECTS_BUFFER_SIZE)
+        if format == 'jsonl':
+            import json
+            self._encoder = json.JSONEncoder(ensure_ascii=False)
+        else:
+            import csv
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(REJECTS_HEADER)
+
+    def write(self, line_number: int, reason: str, raw: str) -> None:
+        self.count += 1
+        if self.format == 'jsonl':
+            self._file.write(self._encoder.encode({'linha': line_number, 'motivo': reason, 'conteudo': raw}))
+            self._file.write('\n')
+        else:
+            self._writer.writerow((line_number, reason, raw))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'RejectsWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -1,93 +1,288 @@
-import json
+import io
+import itertools
 import logging
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterable, Iterator, TextIO, Tuple
 from datetime import date
-from tabulate import tabulate
 
 from vendas_cli.parser import Sale
-from vendas_cli.core import SaleMetrics
+from vendas_cli.core import SaleMetrics, SortedItemsView
+from vendas_cli.errors import ErrorReport
 
+logger = logging.getLogger(__name__)
+
+
+def iter_sales_by_date(sales: Iterable[Sale], start_date: Optional[date] = None, end_date: Optional[date] = None, report: Optional[ErrorReport] = None) -> Iterator[Sale]:
 
-def filter_sales_by_date(sales: List[Sale], start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Sale]:
-   
     if start_date is None and end_date is None:
-        logging.debug("Nenhum filtro de data aplicado.")
-        return sales
+        logger.debug("Nenhum filtro de data aplicado.")
+        yield from sales
+        return
+
+    own_report = report is None
+    if report is None:
+        report = ErrorReport()
 
-    sales_filtered: List[Sale] = []
     log_msg_parts = ["Filtrando vendas"]
     if start_date:
         log_msg_parts.append(f"a partir de {start_date.isoformat()}")
     if end_date:
         log_msg_parts.append(f"até {end_date.isoformat()}")
-    logging.info(" ".join(log_msg_parts) + ".")
+    logger.info(" ".join(log_msg_parts) + ".")
 
     for sale in sales:
         try:
             sale_date = sale["data"]
             start_match = start_date is None or sale_date >= start_date
             end_match = end_date is None or sale_date <= end_date
-            
+
             if start_match and end_match:
-                sales_filtered.append(sale)
+                yield sale
         except KeyError:
-            logging.warning(f"Registro de venda inválido encontrado durante a filtragem: {sale}. Ignorando.")
+            report.record('registro_invalido', logger, "Registro de venda inválido encontrado durante a filtragem: %s. Ignorando.", sale)
         except TypeError:
-             logging.warning(f"Registro de venda com data inválida encontrado durante a filtragem: {sale}. Ignorando.")
+            report.record('data_invalida', logger, "Registro de venda com data inválida encontrado durante a filtragem: %s. Ignorando.", sale)
+
+    if own_report:
+        report.log_summary(logger)
 
-    logging.info(f"{len(sales_filtered)} vendas encontradas no período especificado.")
+def filter_sales_by_date(sales: List[Sale], start_date: Optional[date] = None, end_date: Optional[date] = None, report: Optional[ErrorReport] = None) -> List[Sale]:
+
+    if start_date is None and end_date is None:
+        logger.debug("Nenhum filtro de data aplicado.")
+        return sales
+
+    sales_filtered = list(iter_sales_by_date(sales, start_date, end_date, report))
+    logger.info("%d vendas encontradas no período especificado.", len(sales_filtered))
     return sales_filtered
 
-def format_text(metrics: SaleMetrics) -> str:
-    output_lines = []
-    output_lines.append("--- Relatório de Vendas ---")
+TABLE_HEADERS = ("Produto", "Valor Total")
+
+def _format_value(valor: float) -> str:
+    return f"R$ {valor:.2f}"
+
+def _looks_numeric(text: str) -> bool:
+    # Espelha a detecção de tipos do tabulate: uma coluna só de números ou
+    # booleanos é alinhada/formatada de outro jeito.
+    if text in ("True", "False"):
+        return True
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+def _width_function() -> Callable[[str], int]:
+    # Mesma medida de largura que o tabulate usa: wcwidth quando instalado.
+    try:
+        from wcwidth import wcswidth
+    except ImportError:
+        return len
+    return wcswidth
+
+def _write_tabulate_table(items: Iterable[Tuple[str, float]], stream: TextIO) -> None:
+    from tabulate import tabulate
+
+    rows = [[produto, _format_value(valor)] for produto, valor in items]
+    stream.write(tabulate(rows, headers=list(TABLE_HEADERS), tablefmt="grid"))
+
+def write_product_table(items: Iterable[Tuple[str, float]], stream: TextIO) -> None:
+    # Tabela no formato "grid" do tabulate, byte a byte, sem montar a tabela
+    # em memória: a primeira passada calcula as larguras, a segunda escreve.
+    # Nomes que o tabulate trataria de forma especial (multilinha, tabs,
+    # códigos ANSI, espaços nas bordas, coluna inteira numérica) caem no
+    # próprio tabulate.
+    width_of = None
+    produto_width = len(TABLE_HEADERS[0]) + 2
+    valor_width = len(TABLE_HEADERS[1]) + 2
+    has_text = False
+    for produto, valor in items:
+        if not produto.isprintable() or produto != produto.strip():
+            _write_tabulate_table(items, stream)
+            return
+        if produto.isascii():
+            width = len(produto)
+        else:
+            if width_of is None:
+                width_of = _width_function()
+            width = width_of(produto)
+            if width < 0:
+                _write_tabulate_table(items, stream)
+                return
+        if width > produto_width:
+            produto_width = width
+        width = len(_format_value(valor))
+        if width > valor_width:
+            valor_width = width
+        if not has_text and not _looks_numeric(produto):
+            has_text = True
+    if not has_text:
+        _write_tabulate_table(items, stream)
+        return
 
-    output_lines.append("\nVendas Totais por Produto:")
+    border = "+" + "-" * (produto_width + 2) + "+" + "-" * (valor_width + 2) + "+"
+    stream.write(
+        border + "\n| " + TABLE_HEADERS[0].ljust(produto_width) + " | " + TABLE_HEADERS[1].ljust(valor_width) + " |\n"
+        + border.replace("-", "=")
+    )
+    for produto, valor in items:
+        padding = produto_width - (len(produto) if width_of is None or produto.isascii() else width_of(produto))
+        formatted = _format_value(valor)
+        stream.write(
+            "\n| " + produto + " " * padding + " | " + formatted + " " * (valor_width - len(formatted)) + " |\n" + border
+        )
+
+class _ItemsPage:
+    # Fatia re-iterável de uma sequência ordenada de itens: a tabela percorre
+    # os itens duas vezes (larguras e escrita) sem copiá-los para uma lista.
+    def __init__(self, items: Iterable[Tuple[str, float]], start: int, stop: int) -> None:
+        self._items = items
+        self._start = start
+        self._stop = stop
+
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return itertools.islice(iter(self._items), self._start, self._stop)
+
+    def __len__(self) -> int:
+        return max(0, self._stop - self._start)
+
+def write_text(metrics: SaleMetrics, stream: TextIO, max_rows: Optional[int] = None, offset: int = 0) -> None:
+    stream.write("--- Relatório de Vendas ---\n\nVendas Totais por Produto:\n")
     if metrics["total_por_produto"]:
-        product_tables = [
-            [produto, f"R$ {valor:.2f}"] 
-            for produto, valor in sorted(metrics["total_por_produto"].items())
-        ]
-        output_lines.append(tabulate(product_tables, headers=["Produto", "Valor Total"], tablefmt="grid"))
+        items = metrics["total_por_produto"].items()
+        if not isinstance(items, SortedItemsView):
+            items = sorted(items)
+        total_items = len(items)
+        if max_rows is not None or offset:
+            stop = total_items if max_rows is None else min(total_items, offset + max_rows)
+            shown = _ItemsPage(items, offset, stop)
+        else:
+            shown = items
+        if not len(shown):
+            stream.write(f"Nenhum produto nesta página ({total_items} produtos no total).")
+        else:
+            write_product_table(shown, stream)
+            if len(shown) < total_items:
+                stream.write(f"\nExibindo produtos {offset + 1} a {offset + len(shown)} de {total_items}.")
     else:
-        output_lines.append("Nenhuma venda encontrada.")
+        stream.write("Nenhuma venda encontrada.")
 
-    output_lines.append(f"\nValor Total Geral das Vendas: R$ {metrics['valor_total_vendas']:.2f}")
+    stream.write(f"\n\nValor Total Geral das Vendas: R$ {metrics['valor_total_vendas']:.2f}\n")
 
     most_sold = metrics["produto_mais_vendido"]
     if most_sold:
-        output_lines.append(f"Produto Mais Vendido: {most_sold[0]} (R$ {most_sold[1]:.2f})")
+        stream.write(f"Produto Mais Vendido: {most_sold[0]} (R$ {most_sold[1]:.2f})")
     else:
-        output_lines.append("Produto Mais Vendido: N/A (Nenhuma venda)")
-        
-    output_lines.append("\n---------------------------")
-    return "\n".join(output_lines)
-
-def format_json(metrics: SaleMetrics) -> str:
-    
-    serializable_metrics = {
-        "total_por_produto": metrics["total_por_produto"],
-        "valor_total_vendas": metrics["valor_total_vendas"],
-        "produto_mais_vendido": {
-            "produto": metrics["produto_mais_vendido"][0],
-            "valor_total": metrics["produto_mais_vendido"][1]
-        } if metrics["produto_mais_vendido"] else None
-    }
+        stream.write("Produto Mais Vendido: N/A (Nenhuma venda)")
+
+    stream.write("\n\n---------------------------")
+
+def format_text(metrics: SaleMetrics, max_rows: Optional[int] = None, offset: int = 0) -> str:
+    buffer = io.StringIO()
+    write_text(metrics, buffer, max_rows, offset)
+    return buffer.getvalue()
+
+def _json_encoders() -> Tuple[Callable[[str], str], Callable[[Any], str]]:
+    import json
+    from json.encoder import encode_basestring
+
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def encode_value(value: Any) -> str:
+        # Atalho para o caso comum (float finito); o restante, inclusive
+        # NaN/Infinity e tipos não serializáveis, segue pelo encoder padrão.
+        if type(value) is float and value - value == 0:
+            return repr(value)
+        return encode(value)
+
+    return encode_basestring, encode_value
+
+def write_json(metrics: SaleMetrics, stream: TextIO, pretty: bool = True) -> None:
+    encode_key, encode_value = _json_encoders()
+    if pretty:
+        nl, nl2, item_sep, key_sep, end = "\n    ", "\n        ", ",", ": ", "\n}"
+    else:
+        nl, nl2, item_sep, key_sep, end = "", "", ",", ":", "}"
+
+    stream.write("{" + nl + '"total_por_produto"' + key_sep + "{")
+    first = True
+    for produto, valor in metrics["total_por_produto"].items():
+        # Cada produto é escrito assim que é lido: o relatório nunca existe
+        # inteiro em memória como uma única string.
+        stream.write(("" if first else item_sep) + nl2 + encode_key(produto) + key_sep + encode_value(valor))
+        first = False
+    if not first:
+        stream.write(nl)
+    stream.write("}" + item_sep + nl + '"valor_total_vendas"' + key_sep + encode_value(metrics["valor_total_vendas"]))
+    stream.write(item_sep + nl + '"produto_mais_vendido"' + key_sep)
+
+    most_sold = metrics["produto_mais_vendido"]
+    if most_sold:
+        stream.write(
+            "{" + nl2 + '"produto"' + key_sep + encode_key(most_sold[0])
+            + item_sep + nl2 + '"valor_total"' + key_sep + encode_value(most_sold[1]) + nl + "}"
+        )
+    else:
+        stream.write("null")
+    stream.write(end)
+
+def write_ndjson(metrics: SaleMetrics, stream: TextIO) -> None:
+    encode_key, encode_value = _json_encoders()
+    for produto, valor in metrics["total_por_produto"].items():
+        stream.write('{"tipo": "produto", "produto": ' + encode_key(produto) + ', "valor_total": ' + encode_value(valor) + "}\n")
+
+    most_sold = metrics["produto_mais_vendido"]
+    most_sold_json = (
+        '{"produto": ' + encode_key(most_sold[0]) + ', "valor_total": ' + encode_value(most_sold[1]) + "}"
+        if most_sold else "null"
+    )
+    stream.write(
+        '{"tipo": "resumo", "valor_total_vendas": ' + encode_value(metrics["valor_total_vendas"])
+        + ', "produto_mais_vendido": ' + most_sold_json + "}\n"
+    )
+
+def format_json(metrics: SaleMetrics, pretty: bool = True) -> str:
+    buffer = io.StringIO()
     try:
-        return json.dumps(serializable_metrics, indent=4, ensure_ascii=False)
+        write_json(metrics, buffer, pretty)
     except TypeError as e:
-        logging.error(f"Erro ao serializar métricas para JSON: {e}")
+        import json
+
+        logger.error("Erro ao serializar métricas para JSON: %s", e)
         return json.dumps({"erro": "Falha ao gerar JSON", "detalhes": str(e)}, indent=4)
+    return buffer.getvalue()
+
+def format_ndjson(metrics: SaleMetrics) -> str:
+    buffer = io.StringIO()
+    write_ndjson(metrics, buffer)
+    return buffer.getvalue().rstrip("\n")
+
+def _invalid_format(format: str) -> ValueError:
+    error_msg = f"Formato de saída inválido: \t{format}\t. Use 'text', 'json' ou 'ndjson'."
+    logger.error(error_msg)
+    return ValueError(error_msg)
 
 def generate_report(metrics: SaleMetrics, format: str) -> str:
-   
-    logging.info(f"Gerando relatório no formato: {format}")
+
+    logger.info("Gerando relatório no formato: %s", format)
     if format == "text":
         return format_text(metrics)
     elif format == "json":
         return format_json(metrics)
+    elif format == "ndjson":
+        return format_ndjson(metrics)
     else:
-        error_msg = f"Formato de saída inválido: 	{format}	. Use 'text' ou 'json'."
-        logging.error(error_msg)
-        raise ValueError(error_msg)
+        raise _invalid_format(format)
+
+def write_report(metrics: SaleMetrics, format: str, stream: TextIO, pretty: bool = True, max_rows: Optional[int] = None, offset: int = 0) -> None:
 
+    logger.info("Gerando relatório no formato: %s", format)
+    if format == "text":
+        write_text(metrics, stream, max_rows, offset)
+        stream.write("\n")
+    elif format == "json":
+        write_json(metrics, stream, pretty)
+        stream.write("\n")
+    elif format == "ndjson":
+        write_ndjson(metrics, stream)
+    else:
+        raise _invalid_format(format)
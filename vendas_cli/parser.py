@@ -1,77 +1,350 @@
 import csv
+import io
 import logging
-from typing import List, Dict, Any, TypedDict
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, TypedDict, TYPE_CHECKING
 from datetime import datetime, date
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from vendas_cli.errors import REJECTS_BUFFER_SIZE, ErrorReport, RejectedRowError, RejectsWriter
+
+if TYPE_CHECKING:
+    from vendas_cli.catalog import ProductCatalog
+
+logger = logging.getLogger(__name__)
+
+EXPECTED_HEADERS = ['produto', 'valor', 'data']
 
 class Sale(TypedDict):
     produto: str
     valor: float
     data: date
 
-def read_sales_csv(file_path: str) -> List[Sale]:
-    sales: List[Sale] = []
-    logging.info(f"Iniciando leitura do arquivo CSV: {file_path}")
+# Venda com o produto trocado pelo ID do catálogo (vendas_cli.catalog).
+class EncodedSale(TypedDict):
+    produto_id: int
+    valor: float
+    data: date
+
+def parse_sale_fields(produto: Optional[str], valor: Optional[str], data: Optional[str]) -> Sale:
+    if produto is None or valor is None or data is None:
+        raise RejectedRowError('coluna_ausente', "Linha com menos colunas que o cabeçalho.")
+
+    produto = produto.strip()
+    if not produto:
+        raise RejectedRowError('produto_vazio', "Coluna 'produto' não pode estar vazia.")
+
     try:
-        with open(file_path, mode='r', encoding='utf-8', newline='') as file:
-            csv_reader = csv.DictReader(file)
-            
-            expected_headers = ['produto', 'valor', 'data']
-            if csv_reader.fieldnames is None:
-                error_msg = "CSV vazio ou sem cabeçalho."
-                logging.error(error_msg)
-                raise ValueError(error_msg)
-                
-            if not all(header in csv_reader.fieldnames for header in expected_headers):
-                 missing = set(expected_headers) - set(csv_reader.fieldnames)
-                 error_msg = f"Cabeçalhos ausentes no CSV: {', '.join(missing)}. Esperado: {', '.join(expected_headers)}"
-                 logging.error(error_msg)
-                 raise ValueError(error_msg)
-
-            for i, line in enumerate(csv_reader):
-                line_number = i + 2 
+        valor_float = float(valor.strip().replace(',', '.'))
+    except ValueError as e:
+        raise RejectedRowError('valor_invalido', str(e))
+    if valor_float < 0:
+        raise RejectedRowError('valor_negativo', "Coluna 'valor' não pode ser negativa.")
+
+    date_str = data.strip()
+    if not date_str:
+        raise RejectedRowError('data_vazia', "Coluna 'data' não pode estar vazia.")
+    try:
+        sale_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError as e:
+        raise RejectedRowError('data_invalida', str(e))
+
+    return {'produto': produto, 'valor': valor_float, 'data': sale_date}
+
+def parse_header(fieldnames: Optional[Sequence[str]]) -> List[int]:
+    if fieldnames is None:
+        error_msg = "CSV vazio ou sem cabeçalho."
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    if not all(header in fieldnames for header in EXPECTED_HEADERS):
+        missing = set(EXPECTED_HEADERS) - set(fieldnames)
+        error_msg = f"Cabeçalhos ausentes no CSV: {', '.join(missing)}. Esperado: {', '.join(EXPECTED_HEADERS)}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
+
+    # Como no csv.DictReader, um cabeçalho repetido usa a última ocorrência.
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    return [positions[header] for header in EXPECTED_HEADERS]
+
+def parse_sale_row(row: List[str], indexes: Sequence[int]) -> Sale:
+    i_produto, i_valor, i_data = indexes
+    if len(row) > i_produto and len(row) > i_valor and len(row) > i_data:
+        return parse_sale_fields(row[i_produto], row[i_valor], row[i_data])
+    return parse_sale_fields(
+        row[i_produto] if i_produto < len(row) else None,
+        row[i_valor] if i_valor < len(row) else None,
+        row[i_data] if i_data < len(row) else None,
+    )
+
+def record_rejection(report: ErrorReport, error: Exception, line_number: int, row: List[str]) -> str:
+    if not isinstance(error, RejectedRowError):
+        report.record('erro_inesperado', logger, "Linha %d: Erro inesperado ao processar linha %r: %s. Pulando linha.", line_number, row, error)
+        return 'erro_inesperado'
+    if error.reason == 'coluna_ausente':
+        report.record(error.reason, logger, "Linha %d: Coluna essencial ausente - %s Linha: %r. Pulando linha.", line_number, error, row)
+    else:
+        report.record(error.reason, logger, "Linha %d: Erro de valor ou formato - %s. Linha: %r. Pulando linha.", line_number, error, row)
+    return error.reason
+
+# Iterador sobre o arquivo que guarda as linhas físicas do registro corrente,
+# para que o texto bruto de uma linha rejeitada possa ser gravado sem reler o
+# arquivo. Só é usado quando há um arquivo de rejeitos.
+class _RawLines:
+    def __init__(self, lines: Iterable[str]) -> None:
+        self._lines = iter(lines)
+        self.buffer: List[str] = []
+
+    def __iter__(self) -> '_RawLines':
+        return self
+
+    def __next__(self) -> str:
+        line = next(self._lines)
+        self.buffer.append(line)
+        return line
+
+    def pop_text(self) -> str:
+        text = ''.join(self.buffer).rstrip('\r\n')
+        self.buffer.clear()
+        return text
+
+# Callback que recebe cada linha rejeitada: número da linha, motivo, campos
+# e o texto bruto (None quando não há arquivo de rejeitos).
+RejectSink = Callable[[int, str, List[str], Optional[str]], None]
+
+# Troca, no próprio dict, o nome do produto pelo ID do catálogo.
+def _encode_sale(sale: Any, encode: Callable[[str], int]) -> EncodedSale:
+    sale['produto_id'] = encode(sale.pop('produto'))
+    return sale
+
+def _scan_csv_rows(csv_reader: Any, raw_lines: Optional[_RawLines], indexes: Sequence[int], report: ErrorReport, reject: Optional[RejectSink], first_line: int = 0, stop: Optional[Callable[[], bool]] = None, encode: Optional[Callable[[str], int]] = None) -> Iterator[Any]:
+    for row in csv_reader:
+        if not row:
+            if raw_lines is not None:
+                raw_lines.pop_text()
+        else:
+            try:
+                sale = parse_sale_row(row, indexes)
+            except Exception as e:
+                line_number = first_line + csv_reader.line_num
+                reason = record_rejection(report, e, line_number, row)
+                if reject is not None:
+                    reject(line_number, reason, row, raw_lines.pop_text() if raw_lines is not None else None)
+            else:
+                if raw_lines is not None:
+                    raw_lines.buffer.clear()
+                yield sale if encode is None else _encode_sale(sale, encode)
+        if stop is not None and stop():
+            return
+
+MMAP_HEADER = b'produto,valor,data'
+
+# Mapeia o arquivo em memória se ele tiver exatamente o cabeçalho padrão;
+# devolve o mapa e a posição da primeira linha de dados. Arquivos vazios, que
+# não podem ser mapeados (pipes) ou com outro cabeçalho ficam com o csv.
+def _map_csv(file: Any) -> Optional[Tuple[Any, int]]:
+    import mmap
+
+    try:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    eol = buffer.find(b'\n')
+    header_end = len(buffer) if eol == -1 else eol
+    if buffer[:header_end] not in (MMAP_HEADER, MMAP_HEADER + b'\r'):
+        buffer.close()
+        return None
+    return buffer, header_end + 1
+
+# Linhas do mapa a partir de `pos`, decodificadas sob demanda para o módulo
+# csv. Um \r solto também quebra a linha, como no arquivo aberto com
+# newline=''; `pending` diz se sobrou parte da última linha física.
+class _MappedLines:
+    def __init__(self, buffer: Any, pos: int) -> None:
+        self._buffer = buffer
+        self.pos = pos
+        self.pending: List[str] = []
+
+    def __iter__(self) -> '_MappedLines':
+        return self
+
+    def __next__(self) -> str:
+        if self.pending:
+            return self.pending.pop()
+        if self.pos >= len(self._buffer):
+            raise StopIteration
+        eol = self._buffer.find(b'\n', self.pos)
+        stop = len(self._buffer) if eol == -1 else eol + 1
+        lines = io.StringIO(self._buffer[self.pos:stop].decode('utf-8'), newline='').readlines()
+        self.pos = stop
+        self.pending = lines[:0:-1]
+        return lines[0]
+
+# Leitura byte a byte do layout fixo produto,valor,data sobre um mmap: cada
+# linha é localizada com `find` e só o produto é decodificado; valor e data
+# são convertidos direto dos bytes. Qualquer linha fora do caminho feliz
+# (aspas, \r solto, campo inválido) passa pelo mesmo código do leitor csv,
+# então motivos, mensagens e números de linha não mudam.
+def _scan_mmap_rows(buffer: Any, start: int, report: ErrorReport, reject: Optional[RejectSink], track_raw: bool, encode: Optional[Callable[[str], int]] = None) -> Iterator[Any]:
+    # Com `encode`, os bytes brutos do produto viram chave de um cache de IDs:
+    # um produto repetido nem chega a ser decodificado.
+    product_ids: Dict[bytes, int] = {}
+    find = buffer.find
+    size = len(buffer)
+    indexes = (0, 1, 2)
+    pos = start
+    line_number = 1
+    while pos < size:
+        line_number += 1
+        eol = find(b'\n', pos)
+        if eol == -1:
+            eol = size
+        end = eol - 1 if eol > pos and buffer[eol - 1] == 13 else eol
+
+        if find(b'"', pos, end) != -1 or find(b'\r', pos, end) != -1:
+            # Aspas ou \r solto: o módulo csv lê a partir daqui, linha a linha,
+            # até terminar um registro numa fronteira de linha física.
+            lines = _MappedLines(buffer, pos)
+            raw_lines = _RawLines(lines) if track_raw else None
+            csv_reader = csv.reader(raw_lines if raw_lines is not None else lines)
+            yield from _scan_csv_rows(csv_reader, raw_lines, indexes, report, reject, line_number - 1, lambda: not lines.pending, encode)
+            line_number += csv_reader.line_num - 1
+            pos = lines.pos
+            continue
+
+        if end == pos:
+            pos = eol + 1
+            continue
+
+        sale = None
+        c1 = find(b',', pos, end)
+        c2 = find(b',', c1 + 1, end) if c1 != -1 else -1
+        if c2 != -1:
+            c3 = find(b',', c2 + 1, end)
+            data = buffer[c2 + 1:end if c3 == -1 else c3].strip()
+            # Só o formato AAAA-MM-DD exato segue pelo caminho rápido; o resto
+            # cai no strptime de parse_sale_fields. O produto só é codificado
+            # depois que valor e data passam, para que linhas rejeitadas não
+            # entrem no catálogo.
+            if len(data) == 10 and data[4] == 45 and data[7] == 45 and data[:4].isdigit() and data[5:7].isdigit() and data[8:].isdigit():
                 try:
-                    produto = line['produto'].strip()
-                    if not produto:
-                        raise ValueError("Coluna 'produto' não pode estar vazia.")
-
-                    valor_str = line['valor'].strip().replace(',', '.') 
-                    valor = float(valor_str)
-                    if valor < 0:
-                         raise ValueError("Coluna 'valor' não pode ser negativa.")
-
-                    date_str = line['data'].strip()
-                    if not date_str:
-                        raise ValueError("Coluna 'data' não pode estar vazia.")
-                    sale_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-
-                    sale: Sale = {
-                        'produto': produto,
-                        'valor': valor,
-                        'data': sale_date
-                    }
-                    sales.append(sale)
-                except KeyError as e:
-                    logging.warning(f"Linha {line_number}: Coluna essencial ausente '{e}'. Pulando linha.")
-                except ValueError as e:
-                    logging.warning(f"Linha {line_number}: Erro de valor ou formato - {e}. Linha: {line}. Pulando linha.")
-                except Exception as e:
-                     logging.warning(f"Linha {line_number}: Erro inesperado ao processar linha {line}: {e}. Pulando linha.")
+                    valor = float(buffer[c1 + 1:c2])
+                    if not valor < 0:
+                        sale_date = date(int(data[:4]), int(data[5:7]), int(data[8:]))
+                        raw_product = buffer[pos:c1]
+                        if encode is None:
+                            produto = raw_product.decode('utf-8').strip()
+                            if produto:
+                                sale = {'produto': produto, 'valor': valor, 'data': sale_date}
+                        else:
+                            product_id = product_ids.get(raw_product)
+                            if product_id is None:
+                                produto = raw_product.decode('utf-8').strip()
+                                if produto:
+                                    product_id = product_ids[raw_product] = encode(produto)
+                            if product_id is not None:
+                                sale = {'produto_id': product_id, 'valor': valor, 'data': sale_date}
+                except ValueError:
+                    pass
+
+        if sale is None:
+            text = buffer[pos:end].decode('utf-8')
+            row = text.split(',')
+            try:
+                sale = parse_sale_row(row, indexes)
+            except Exception as e:
+                reason = record_rejection(report, e, line_number, row)
+                if reject is not None:
+                    reject(line_number, reason, row, text if track_raw else None)
+                pos = eol + 1
+                continue
+            if encode is not None:
+                sale = _encode_sale(sale, encode)
+
+        pos = eol + 1
+        yield sale
+
+def iter_sales_csv(file_path: str, report: Optional[ErrorReport] = None, quarantine_path: Optional[str] = None, rejects_path: Optional[str] = None, use_mmap: bool = True) -> Iterator[Sale]:
+    return _iter_csv(file_path, report, quarantine_path, rejects_path, use_mmap, None)
+
+def _iter_csv(file_path: str, report: Optional[ErrorReport], quarantine_path: Optional[str], rejects_path: Optional[str], use_mmap: bool, encode: Optional[Callable[[str], int]]) -> Iterator[Any]:
+    count = 0
+    own_report = report is None
+    if report is None:
+        report = ErrorReport()
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Iniciando leitura do arquivo CSV: %s", file_path)
+    quarantine_file = None
+    quarantine_writer = None
+    rejects = None
+    mapped = None
+    try:
+        with open(file_path, mode='r', encoding='utf-8', newline='') as file:
+            if use_mmap:
+                mapped = _map_csv(file)
+            raw_lines = None
+            if mapped is not None:
+                logger.debug("Lendo %s com o leitor por mmap.", file_path)
+                header = EXPECTED_HEADERS
+            else:
+                if rejects_path is not None:
+                    raw_lines = _RawLines(file)
+                    csv_reader = csv.reader(raw_lines)
+                else:
+                    csv_reader = csv.reader(file)
+                header = next(csv_reader, None)
+                indexes = parse_header(header)
+
+            if quarantine_path is not None:
+                quarantine_file = open(quarantine_path, mode='w', encoding='utf-8', newline='', buffering=REJECTS_BUFFER_SIZE)
+                quarantine_writer = csv.writer(quarantine_file)
+                quarantine_writer.writerow(header)
+            if rejects_path is not None:
+                rejects = RejectsWriter(rejects_path)
+                if raw_lines is not None:
+                    raw_lines.pop_text()
+
+            reject = None
+            if quarantine_writer is not None or rejects is not None:
+                def reject(line_number: int, reason: str, row: List[str], raw: Optional[str]) -> None:
+                    if quarantine_writer is not None:
+                        quarantine_writer.writerow(row)
+                    if rejects is not None:
+                        rejects.write(line_number, reason, raw)
+
+            if mapped is not None:
+                sales = _scan_mmap_rows(mapped[0], mapped[1], report, reject, rejects is not None, encode)
+            else:
+                sales = _scan_csv_rows(csv_reader, raw_lines, indexes, report, reject, encode=encode)
+            for sale in sales:
+                count += 1
+                yield sale
 
     except FileNotFoundError:
-        logging.error(f"Erro: Arquivo não encontrado em '{file_path}'")
-        raise 
+        logger.error("Erro: Arquivo não encontrado em '%s'", file_path)
+        raise
     except ValueError as e:
         raise
     except Exception as e:
-        logging.error(f"Erro inesperado ao ler o arquivo CSV '{file_path}': {e}")
-        raise 
+        logger.error("Erro inesperado ao ler o arquivo CSV '%s': %s", file_path, e)
+        raise
+    finally:
+        if mapped is not None:
+            mapped[0].close()
+        if quarantine_file is not None:
+            quarantine_file.close()
+        if rejects is not None:
+            rejects.close()
 
-    if not sales:
-        logging.warning(f"Nenhuma venda válida encontrada no arquivo {file_path}.")
-    else:
-        logging.info(f"Leitura do arquivo {file_path} concluída. {len(sales)} sales lidas com sucesso.")
-    
-    return sales
+    if own_report:
+        report.log_summary(logger)
+    if not count:
+        logger.warning("Nenhuma venda válida encontrada no arquivo %s.", file_path)
+    elif logger.isEnabledFor(logging.INFO):
+        logger.info("Leitura do arquivo %s concluída. %d sales lidas com sucesso.", file_path, count)
+
+def read_sales_csv(file_path: str, report: Optional[ErrorReport] = None, quarantine_path: Optional[str] = None, rejects_path: Optional[str] = None, use_mmap: bool = True) -> List[Sale]:
+    return list(iter_sales_csv(file_path, report, quarantine_path, rejects_path, use_mmap))
 
+def iter_encoded_sales_csv(file_path: str, catalog: 'ProductCatalog', report: Optional[ErrorReport] = None, quarantine_path: Optional[str] = None, rejects_path: Optional[str] = None, use_mmap: bool = True) -> Iterator[EncodedSale]:
+    # Os leitores montam a venda já com o ID do catálogo; no leitor por mmap
+    # um produto repetido nem é decodificado.
+    return _iter_csv(file_path, report, quarantine_path, rejects_path, use_mmap, catalog.encode)
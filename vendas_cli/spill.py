@@ -0,0 +1,242 @@
+import heapq
+import logging
+import os
+import pickle
+import sys
+import tempfile
+from collections.abc import Mapping
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from vendas_cli.core import SaleMetrics, SortedItemsView
+from vendas_cli.errors import ErrorReport
+from vendas_cli.parser import Sale
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARTITIONS = 64
+
+# Custo aproximado de uma entrada do dicionário além da própria string:
+# slot da tabela hash, índice e o objeto float do total.
+ENTRY_OVERHEAD = 96
+
+RUN_CHUNK_SIZE = 4096
+
+MAX_SPLIT_DEPTH = 4
+
+
+def _partition_of(product: str, depth: int, partitions: int) -> int:
+    # Cada nível de re-particionamento usa uma fatia diferente do hash, para
+    # que uma partição grande demais se espalhe de fato entre as sub-partições.
+    return (hash(product) // partitions ** depth) % partitions
+
+
+def _read_chunks(path: str) -> Iterator[List[tuple]]:
+    with open(path, mode='rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                return
+
+
+# Totais por produto gravados em disco, um arquivo ordenado por partição.
+# Implementa Mapping para ser usado como `total_por_produto` em SaleMetrics:
+# iterar percorre as partições em ordem de produto (heapq.merge) sem carregar
+# o catálogo inteiro; uma consulta por chave lê só a partição do produto.
+class SpilledTotals(Mapping):
+    def __init__(self, directory: 'tempfile.TemporaryDirectory', runs: Dict[Tuple[int, ...], str], partitions: int, length: int) -> None:
+        self._directory = directory
+        self._runs = runs
+        self._partitions = partitions
+        self._length = length
+
+    def _iter_run(self, path: str) -> Iterator[Tuple[str, float]]:
+        for chunk in _read_chunks(path):
+            yield from chunk
+
+    def _iter_items(self) -> Iterator[Tuple[str, float]]:
+        return heapq.merge(*(self._iter_run(path) for path in self._runs.values()), key=lambda item: item[0])
+
+    def __iter__(self) -> Iterator[str]:
+        return (product for product, _ in self._iter_items())
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, product: str) -> float:
+        key: Tuple[int, ...] = ()
+        while key not in self._runs:
+            key = key + (_partition_of(product, len(key), self._partitions),)
+            if len(key) > MAX_SPLIT_DEPTH + 1:
+                raise KeyError(product)
+        for item_product, total in self._iter_run(self._runs[key]):
+            if item_product == product:
+                return total
+        raise KeyError(product)
+
+    def items(self) -> SortedItemsView:
+        return _SpilledItemsView(self)
+
+    def close(self) -> None:
+        self._directory.cleanup()
+
+
+class _SpilledItemsView(SortedItemsView):
+    def __iter__(self) -> Iterator[Tuple[str, float]]:
+        return self._mapping._iter_items()
+
+
+class SpillingAggregator:
+    def __init__(self, max_memory: int, partitions: int = DEFAULT_PARTITIONS, tmp_dir: Optional[str] = None) -> None:
+        self.max_memory = max_memory
+        self.partitions = partitions
+        self.tmp_dir = tmp_dir
+        self.totals: Dict[str, float] = {}
+        self.memory = 0
+        self.spills = 0
+        self.sales_total_value = 0.0
+        # Quantas entradas já foram gravadas: somado à posição no dict em
+        # memória, dá a ordem global da primeira aparição de cada produto.
+        self._spilled_entries = 0
+        self._directory: Optional[tempfile.TemporaryDirectory] = None
+        self._partition_memory: Dict[Tuple[int, ...], int] = {}
+        # Um arquivo aberto por parcial durante toda a agregação: cada
+        # gravação só acrescenta um bloco, sem reabrir o arquivo.
+        self._partials: Dict[Tuple[int, ...], BinaryIO] = {}
+        # Estimativa da maior partição carregada de uma vez no merge.
+        self.largest_partition = 0
+
+    def add(self, product: str, value: float) -> None:
+        totals = self.totals
+        if product in totals:
+            totals[product] += value
+            self.sales_total_value += value
+            return
+        totals[product] = 0.0 + value
+        self.sales_total_value += value
+        self.memory += sys.getsizeof(product) + ENTRY_OVERHEAD
+        if self.memory >= self.max_memory:
+            self._spill()
+
+    def _path(self, key: Tuple[int, ...], kind: str) -> str:
+        return os.path.join(self._directory.name, kind + "-" + "-".join(map(str, key)))
+
+    def _spill(self) -> None:
+        if self._directory is None:
+            self._directory = tempfile.TemporaryDirectory(prefix="vendas-cli-", dir=self.tmp_dir)
+        self.spills += 1
+        logger.debug("Tabela de produtos atingiu ~%d bytes; gravando parciais em disco (%d).", self.memory, self.spills)
+        start = self._spilled_entries
+        self._write_partitions(((product, value, start + rank) for rank, (product, value) in enumerate(self.totals.items())), ())
+        self._spilled_entries += len(self.totals)
+        self.totals = {}
+        self.memory = 0
+
+    # Cada item é (produto, total parcial, ordem da primeira aparição).
+    def _write_partitions(self, items: Iterable[Tuple[str, float, int]], parent: Tuple[int, ...]) -> None:
+        buckets: List[List[Tuple[str, float, int]]] = [[] for _ in range(self.partitions)]
+        depth = len(parent)
+        partitions = self.partitions
+        for item in items:
+            buckets[_partition_of(item[0], depth, partitions)].append(item)
+        for index, bucket in enumerate(buckets):
+            if bucket:
+                key = parent + (index,)
+                file = self._partials.get(key)
+                if file is None:
+                    file = self._partials[key] = open(self._path(key, "parcial"), mode='ab')
+                pickle.dump(bucket, file, protocol=pickle.HIGHEST_PROTOCOL)
+                # Estimativa conservadora: o mesmo produto gravado em várias
+                # parciais conta várias vezes.
+                memory = sum(sys.getsizeof(item[0]) for item in bucket) + ENTRY_OVERHEAD * len(bucket)
+                self._partition_memory[key] = self._partition_memory.get(key, 0) + memory
+
+    def _merge_partition(self, path: str) -> List[Tuple[str, float, int]]:
+        merged: Dict[str, float] = {}
+        ranks: Dict[str, int] = {}
+        for chunk in _read_chunks(path):
+            for product, value, rank in chunk:
+                if product in merged:
+                    merged[product] += value
+                    if rank < ranks[product]:
+                        ranks[product] = rank
+                else:
+                    merged[product] = value
+                    ranks[product] = rank
+        os.remove(path)
+        return sorted((product, total, ranks[product]) for product, total in merged.items())
+
+    # O total geral é o acumulado venda a venda em `add`, como em
+    # calculate_sales_metrics; no mais vendido, empates ficam com o produto
+    # que apareceu primeiro (o mesmo resultado do max() sobre o dict).
+    def finish(self) -> Tuple[Mapping, float, Optional[Tuple[str, float]]]:
+        total = self.sales_total_value
+        best: Optional[Tuple[str, float]] = None
+        if self._directory is None:
+            # Nunca passou do limite: o resultado é o próprio dicionário.
+            for product, value in self.totals.items():
+                if best is None or value > best[1]:
+                    best = (product, value)
+            return self.totals, total, best
+
+        if self.totals:
+            self._spill()
+
+        runs: Dict[Tuple[int, ...], str] = {}
+        length = 0
+        best_rank = 0
+        pending = sorted(self._partition_memory, reverse=True)
+        while pending:
+            key = pending.pop()
+            path = self._path(key, "parcial")
+            memory = self._partition_memory.pop(key)
+            self._partials.pop(key).close()
+            if memory > self.max_memory and len(key) <= MAX_SPLIT_DEPTH:
+                # A partição sozinha não cabe no limite: é redistribuída em
+                # sub-partições, uma parcial por vez, antes do merge.
+                for chunk in _read_chunks(path):
+                    self._write_partitions(chunk, key)
+                os.remove(path)
+                pending.extend(sorted((child for child in self._partition_memory if child[:-1] == key), reverse=True))
+                continue
+
+            self.largest_partition = max(self.largest_partition, memory)
+            ordered = self._merge_partition(path)
+            run_path = self._path(key, "ordenado")
+            with open(run_path, mode='wb') as file:
+                for start in range(0, len(ordered), RUN_CHUNK_SIZE):
+                    pickle.dump([(product, value) for product, value, _ in ordered[start:start + RUN_CHUNK_SIZE]], file, protocol=pickle.HIGHEST_PROTOCOL)
+            runs[key] = run_path
+            length += len(ordered)
+            for product, value, rank in ordered:
+                if best is None or value > best[1] or (value == best[1] and rank < best_rank):
+                    best = (product, value)
+                    best_rank = rank
+
+        logger.info("Agregação externa concluída: %d produtos em %d partições, %d gravações parciais.", length, len(runs), self.spills)
+        return SpilledTotals(self._directory, runs, self.partitions, length), total, best
+
+
+def calculate_sales_metrics_spilling(sales: Iterable[Sale], max_memory: int, report: Optional[ErrorReport] = None, tmp_dir: Optional[str] = None) -> SaleMetrics:
+    own_report = report is None
+    if report is None:
+        report = ErrorReport()
+
+    aggregator = SpillingAggregator(max_memory, tmp_dir=tmp_dir)
+    for sale in sales:
+        try:
+            aggregator.add(sale['produto'], sale['valor'])
+        except KeyError as e:
+            report.record('registro_invalido', logger, "Registro de venda inválido encontrado durante o cálculo: %s. Chave ausente: %s. Ignorando registro.", sale, e)
+        except TypeError as e:
+            report.record('tipo_invalido', logger, "Registro de venda com tipo inválido encontrado: %s. Erro: %s. Ignorando registro.", sale, e)
+
+    if own_report:
+        report.log_summary(logger)
+
+    totals, sales_total_value, best_selling_product = aggregator.finish()
+    return {
+        'total_por_produto': totals,
+        'valor_total_vendas': sales_total_value,
+        'produto_mais_vendido': best_selling_product
+    }
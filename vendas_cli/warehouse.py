@@ -0,0 +1,144 @@
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from vendas_cli.parser import Sale
+from vendas_cli.core import SaleMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Os índices incluem as colunas lidas pelas consultas de relatório, para que
+# o SQLite responda direto pelo índice sem visitar a tabela.
+# `arquivos` registra cada CSV importado (caminho absoluto, tamanho e data de
+# modificação), para que reimportar o mesmo arquivo não duplique as vendas.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vendas (
+    produto TEXT NOT NULL,
+    valor REAL NOT NULL,
+    data TEXT NOT NULL,
+    arquivo_id INTEGER REFERENCES arquivos (id)
+);
+CREATE TABLE IF NOT EXISTS arquivos (
+    id INTEGER PRIMARY KEY,
+    caminho TEXT NOT NULL UNIQUE,
+    tamanho INTEGER NOT NULL,
+    modificado_ns INTEGER NOT NULL,
+    vendas INTEGER NOT NULL,
+    importado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vendas_data ON vendas (data, produto, valor);
+CREATE INDEX IF NOT EXISTS idx_vendas_produto ON vendas (produto, valor);
+"""
+
+INSERT_SALE = "INSERT INTO vendas (produto, valor, data, arquivo_id) VALUES (?, ?, ?, ?)"
+
+
+def connect_warehouse(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path)
+    connection.executescript(SCHEMA)
+    # Bancos criados antes do registro de arquivos não têm a coluna; as
+    # vendas antigas ficam sem arquivo associado.
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(vendas)")]
+    if "arquivo_id" not in columns:
+        connection.execute("ALTER TABLE vendas ADD COLUMN arquivo_id INTEGER REFERENCES arquivos (id)")
+    connection.execute("CREATE INDEX IF NOT EXISTS idx_vendas_arquivo ON vendas (arquivo_id)")
+    connection.commit()
+    return connection
+
+
+def _insert_sales(connection: sqlite3.Connection, sales: Iterable[Sale], batch_size: int, file_id: Optional[int]) -> int:
+    count = 0
+    batch: List[Tuple[str, float, str, Optional[int]]] = []
+    for sale in sales:
+        batch.append((sale['produto'], sale['valor'], sale['data'].isoformat(), file_id))
+        if len(batch) >= batch_size:
+            connection.executemany(INSERT_SALE, batch)
+            count += len(batch)
+            batch.clear()
+    if batch:
+        connection.executemany(INSERT_SALE, batch)
+        count += len(batch)
+    return count
+
+
+def ingest_sales(connection: sqlite3.Connection, sales: Iterable[Sale], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    # Uma única transação para o arquivo inteiro: ou todas as vendas entram,
+    # ou nenhuma (o `with` faz rollback se a leitura falhar no meio).
+    with connection:
+        count = _insert_sales(connection, sales, batch_size, None)
+    logger.info("%d vendas gravadas no banco.", count)
+    return count
+
+
+# Importa as vendas de um arquivo e registra o arquivo na mesma transação.
+# Um arquivo já importado e inalterado é ignorado (retorna None, sem ler
+# `sales`); com `replace`, as vendas anteriores dele são substituídas. Um
+# arquivo já importado que mudou desde então exige `replace`.
+def ingest_file(connection: sqlite3.Connection, file_path: str, sales: Iterable[Sale], batch_size: int = DEFAULT_BATCH_SIZE, replace: bool = False) -> Optional[int]:
+    stat = os.stat(file_path)
+    path = os.path.abspath(file_path)
+    with connection:
+        previous = connection.execute("SELECT id, tamanho, modificado_ns FROM arquivos WHERE caminho = ?", (path,)).fetchone()
+        if previous is not None and not replace:
+            if previous[1:] == (stat.st_size, stat.st_mtime_ns):
+                logger.info("Arquivo %s já importado; ignorando.", path)
+                return None
+            raise ValueError(f"O arquivo {file_path} já foi importado e mudou desde então. Use --replace para substituir as vendas dele.")
+
+        imported_at = datetime.now().isoformat(timespec='seconds')
+        if previous is not None:
+            file_id = previous[0]
+            deleted = connection.execute("DELETE FROM vendas WHERE arquivo_id = ?", (file_id,)).rowcount
+            logger.info("Substituindo %d vendas importadas anteriormente de %s.", deleted, path)
+            connection.execute(
+                "UPDATE arquivos SET tamanho = ?, modificado_ns = ?, vendas = 0, importado_em = ? WHERE id = ?",
+                (stat.st_size, stat.st_mtime_ns, imported_at, file_id)
+            )
+        else:
+            file_id = connection.execute(
+                "INSERT INTO arquivos (caminho, tamanho, modificado_ns, vendas, importado_em) VALUES (?, ?, ?, 0, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, imported_at)
+            ).lastrowid
+
+        count = _insert_sales(connection, sales, batch_size, file_id)
+        connection.execute("UPDATE arquivos SET vendas = ? WHERE id = ?", (count, file_id))
+    logger.info("%d vendas de %s gravadas no banco.", count, path)
+    return count
+
+
+def query_sales_metrics(connection: sqlite3.Connection, start_date: Optional[date] = None, end_date: Optional[date] = None) -> SaleMetrics:
+    conditions: List[str] = []
+    params: List[str] = []
+    if start_date is not None:
+        conditions.append("data >= ?")
+        params.append(start_date.isoformat())
+    if end_date is not None:
+        conditions.append("data <= ?")
+        params.append(end_date.isoformat())
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    total_per_product: Dict[str, float] = {}
+    sales_total_value = 0.0
+    best_selling_product: Optional[Tuple[str, float]] = None
+    # Produtos na ordem da primeira venda importada, como o dict de
+    # calculate_sales_metrics: em empate fica o que apareceu primeiro.
+    for product, total in connection.execute(f"SELECT produto, SUM(valor) FROM vendas{where} GROUP BY produto ORDER BY MIN(rowid)", params):
+        total_per_product[product] = total
+        if best_selling_product is None or total > best_selling_product[1]:
+            best_selling_product = (product, total)
+    # O total geral é acumulado venda a venda na ordem de importação, e não
+    # como soma dos totais por produto, para dar o mesmo valor do CSV.
+    for (value,) in connection.execute(f"SELECT valor FROM vendas{where} ORDER BY rowid", params):
+        sales_total_value += value
+
+    logger.info("Consulta ao banco concluída: %d produtos.", len(total_per_product))
+    return {
+        'total_por_produto': total_per_product,
+        'valor_total_vendas': sales_total_value,
+        'produto_mais_vendido': best_selling_product
+    }
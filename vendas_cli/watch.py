@@ -0,0 +1,205 @@
+import csv
+import logging
+import os
+import time
+from datetime import date
+from typing import Callable, List, Optional, TextIO
+
+from vendas_cli.core import SalesAccumulator
+from vendas_cli.errors import ErrorReport
+from vendas_cli.parser import Sale, parse_header, parse_sale_row, record_rejection
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+
+
+# Acompanha um CSV que cresce por append (como `tail -F`): cada chamada a
+# `poll` lê apenas os bytes novos desde a anterior. Uma linha sem `\n` final
+# fica pendente até ser completada. Se o arquivo for rotacionado (outro inode
+# no mesmo caminho), o restante do antigo é lido e o novo é aberto do início;
+# se for truncado, a leitura recomeça do início. Nos dois casos o primeiro
+# registro volta a ser tratado como cabeçalho.
+class CsvTail:
+    def __init__(self, path: str, report: Optional[ErrorReport] = None) -> None:
+        self.path = path
+        self.report = report if report is not None else ErrorReport()
+        self._file = None
+        self._inode: Optional[int] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pending = b""
+        self._record_lines: List[str] = []
+        self._in_quotes = False
+        self._indexes: Optional[List[int]] = None
+        self._line_number = 0
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.path, mode='rb')
+        except FileNotFoundError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._reset()
+        logger.info("Acompanhando o arquivo %s.", self.path)
+        return True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def poll(self) -> List[Sale]:
+        sales: List[Sale] = []
+        if self._file is None and not self._open():
+            return sales
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None  # rotacionado e o novo arquivo ainda não foi criado
+
+        if stat is not None and stat.st_ino != self._inode:
+            logger.info("Arquivo %s rotacionado; reabrindo.", self.path)
+            self._read_available(sales)
+            self.close()
+            if not self._open():
+                return sales
+        elif stat is not None and stat.st_size < self._file.tell():
+            logger.info("Arquivo %s truncado; relendo do início.", self.path)
+            self._file.seek(0)
+            self._reset()
+
+        self._read_available(sales)
+        return sales
+
+    def _read_available(self, sales: List[Sale]) -> None:
+        while True:
+            chunk = self._file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            lines = (self._pending + chunk).split(b"\n")
+            self._pending = lines.pop()
+            for line in lines:
+                self._feed_line(line, sales)
+
+    def _feed_line(self, raw: bytes, sales: List[Sale]) -> None:
+        self._line_number += 1
+        try:
+            line = raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            record_rejection(self.report, e, self._line_number, [raw.decode('utf-8', errors='replace')])
+            return
+
+        # Um campo entre aspas pode conter quebras de linha: junta as linhas
+        # até as aspas fecharem antes de entregar o registro ao csv.
+        self._record_lines.append(line + "\n")
+        if self._in_quotes or '"' in line:
+            self._in_quotes = _ends_in_quoted_field(line, self._in_quotes)
+            if self._in_quotes:
+                return
+        lines = self._record_lines
+        self._record_lines = []
+        for row in csv.reader(lines):
+            self._feed_row(row, sales)
+
+    def _feed_row(self, row: List[str], sales: List[Sale]) -> None:
+        if not row:
+            return
+        if self._indexes is None:
+            self._indexes = parse_header(row)
+            return
+        try:
+            sales.append(parse_sale_row(row, self._indexes))
+        except Exception as e:
+            record_rejection(self.report, e, self._line_number, row)
+
+
+# Diz se a linha termina dentro de um campo entre aspas, com as regras do
+# módulo csv: aspas só abrem um campo quando são o primeiro caractere dele
+# (no meio de um campo sem aspas são literais, como em `TV 5" A`) e `""`
+# dentro do campo é uma aspa escapada.
+def _ends_in_quoted_field(line: str, in_quotes: bool) -> bool:
+    field_start = not in_quotes
+    i = 0
+    length = len(line)
+    while i < length:
+        char = line[i]
+        if in_quotes:
+            if char == '"':
+                if i + 1 < length and line[i + 1] == '"':
+                    i += 2
+                    continue
+                in_quotes = False
+        elif char == ',':
+            field_start = True
+            i += 1
+            continue
+        elif char == '"' and field_start:
+            in_quotes = True
+        field_start = False
+        i += 1
+    return in_quotes
+
+def watch_sales(
+    path: str,
+    render: Callable[[SalesAccumulator], None],
+    interval: float = 2.0,
+    poll_interval: float = 0.5,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    report: Optional[ErrorReport] = None,
+    max_polls: Optional[int] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic,
+) -> SalesAccumulator:
+    accumulator = SalesAccumulator()
+    tail = CsvTail(path, report)
+    # Renderiza no máximo uma vez por `interval` e só se algo mudou; entre as
+    # leituras o processo dorme `poll_interval` em vez de girar em loop.
+    dirty = True
+    last_render: Optional[float] = None
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            for sale in tail.poll():
+                sale_date = sale['data']
+                if (start_date is None or sale_date >= start_date) and (end_date is None or sale_date <= end_date):
+                    accumulator.add(sale)
+                    dirty = True
+
+            now = clock()
+            if dirty and (last_render is None or now - last_render >= interval):
+                render(accumulator)
+                last_render = now
+                dirty = False
+
+            if max_polls is None or polls < max_polls:
+                sleep(poll_interval)
+    finally:
+        tail.close()
+    return accumulator
+
+
+def make_renderer(stream: TextIO, format: str = "text") -> Callable[[SalesAccumulator], None]:
+    from vendas_cli.output import write_json, write_text
+
+    clear = format == "text" and stream.isatty()
+
+    def render(accumulator: SalesAccumulator) -> None:
+        if format == "json":
+            # Um snapshot JSON compacto por linha, para ser consumido em pipe.
+            write_json(accumulator.metrics(), stream, pretty=False)
+        else:
+            if clear:
+                stream.write(CLEAR_SCREEN)
+            write_text(accumulator.metrics(), stream)
+            stream.write(f"\n{accumulator.count} vendas processadas. Atualizado em {time.strftime('%H:%M:%S')}.")
+        stream.write("\n")
+        stream.flush()
+
+    return render